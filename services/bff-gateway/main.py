@@ -10,20 +10,23 @@ P0.5: Implements ring buffer for event replay and Last-Event-ID support
 """
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import strawberry
 from strawberry.fastapi import GraphQLRouter
 from strawberry.subscriptions import GRAPHQL_TRANSPORT_WS_PROTOCOL, GRAPHQL_WS_PROTOCOL
 from typing import Optional, List, Dict, Any, AsyncGenerator
 from enum import Enum
 from datetime import datetime
-from collections import deque
+from collections import deque, defaultdict
 import httpx
+import orjson
 import structlog
 import asyncio
 import json
 import os
-import uuid
+import time
+import zlib
+import base64
 from contextlib import asynccontextmanager
 
 # Kafka consumer (aiokafka)
@@ -53,14 +56,33 @@ KAFKA_TOPIC_LOGS = "logs.recon"
 kafka_consumer: Optional[AIOKafkaConsumer] = None
 
 # Event queues per subscription (mission_id -> list of queues)
+# Queues are bounded so a slow subscriber cannot grow memory or stall the consumer
+SUBSCRIBER_QUEUE_SIZE = 1024
 event_queues: Dict[str, List[asyncio.Queue]] = {}
 log_queues: Dict[str, List[asyncio.Queue]] = {}
 
 # P0.5: Ring buffer for event replay on reconnect
 # Stores last N events per mission with unique event IDs
 RING_BUFFER_SIZE = 1000  # Store last 1000 events per mission
-event_ring_buffers: Dict[str, deque] = {}  # mission_id -> deque of events
-event_id_counter: int = 0  # Global event counter for unique IDs
+event_ring_buffers: Dict[str, deque] = {}  # mission_id -> deque of (seq, event, pre-built SSE frame)
+
+# SSE event IDs are "<run_id[:8]><boot epoch><seq as 12 hex digits>" from a per-run monotonic
+# counter, so the ID itself carries the ordering used for Last-Event-ID replay. Counters
+# restart at 0 with the process: the random per-process epoch makes IDs issued before a
+# restart unknown (full replay) rather than comparable to the new sequence.
+SSE_SEQ_HEX_DIGITS = 12
+_SSE_EPOCH = os.urandom(4).hex()
+_seq_counters: Dict[str, int] = defaultdict(int)  # run_id -> last issued sequence number
+
+# Serialized snapshot frame per mission: run_id -> (monotonic time built, frame bytes)
+# Invalidated whenever a new event lands in the mission's ring buffer. Writes that reach
+# graph-service without a Kafka event are not seen here, so entries also expire after
+# SNAPSHOT_CACHE_TTL and are bypassed entirely while no Kafka consumer is running.
+SNAPSHOT_CACHE_TTL = float(os.getenv("SNAPSHOT_CACHE_TTL", "2.0"))
+_snapshot_cache: Dict[str, tuple[float, bytes]] = {}
+
+# Idle interval between SSE keepalive frames (seconds)
+SSE_KEEPALIVE_INTERVAL = 15.0
 
 # P0.2: Event ID dedup - track seen event_ids to prevent duplicates
 # Use combined set (for O(1) lookup) + deque (for LRU eviction) per mission
@@ -93,50 +115,117 @@ def is_event_duplicate(run_id: str, event_id: str) -> bool:
     return False
 
 
-def generate_sse_event_id() -> str:
-    """Generate unique SSE event ID for Last-Event-ID tracking"""
-    global event_id_counter
-    event_id_counter += 1
-    return f"evt_{event_id_counter}_{uuid.uuid4().hex[:8]}"
+# Keepalive frame where only the SSE id varies (filled in with bytes %-formatting)
+_KEEPALIVE_FRAME_TEMPLATE = b"id: %b\ndata: " + orjson.dumps({"type": "keepalive"}) + b"\n\n"
 
 
-def add_event_to_ring_buffer(mission_id: str, event: dict) -> str:
-    """Add event to ring buffer with unique SSE event ID"""
+def _build_sse_frame(sse_id: bytes, data: bytes) -> bytes:
+    """Assemble an SSE frame directly as bytes (no str -> bytes re-encode).
+
+    A single join sizes and copies the output once instead of building an
+    intermediate bytes object per concatenation, which matters for large payloads.
+    """
+    return b"".join((b"id: ", sse_id, b"\ndata: ", data, b"\n\n"))
+
+
+# Opt-in per-frame compression: frames whose data exceeds this size are sent as
+# "event: gz" with base64(zlib(data)) so large snapshots/log bursts shrink on the wire
+SSE_COMPRESS_MIN_BYTES = 2048
+
+
+def _compress_sse_frame(frame: bytes) -> bytes:
+    """Rewrite a single SSE frame as a zlib-compressed "gz" event if its data is large"""
+    header_end = frame.find(b"\ndata: ")
+    data = frame[header_end + 7:-2]
+    if header_end < 0 or len(data) <= SSE_COMPRESS_MIN_BYTES:
+        return frame
+    return frame[:header_end] + b"\nevent: gz\ndata: " + base64.b64encode(zlib.compress(data, 1)) + b"\n\n"
+
+
+def generate_sse_event_id(run_id: str) -> str:
+    """Generate unique, ordered SSE event ID for Last-Event-ID tracking"""
+    n = _seq_counters[run_id] = _seq_counters[run_id] + 1
+    return f"{run_id[:8]}{_SSE_EPOCH}{n:012x}"
+
+
+def parse_sse_event_seq(run_id: str, sse_event_id: str) -> Optional[int]:
+    """Recover the sequence number from an SSE event ID, or None if it is not one of ours"""
+    prefix = run_id[:8] + _SSE_EPOCH
+    if len(sse_event_id) != len(prefix) + SSE_SEQ_HEX_DIGITS or not sse_event_id.startswith(prefix):
+        return None
+    try:
+        return int(sse_event_id[len(prefix):], 16)
+    except ValueError:
+        return None
+
+
+def add_event_to_ring_buffer(mission_id: str, event: dict) -> tuple[str, bytes]:
+    """Add event to ring buffer with unique SSE event ID; returns (sse_event_id, SSE frame)"""
     if mission_id not in event_ring_buffers:
         event_ring_buffers[mission_id] = deque(maxlen=RING_BUFFER_SIZE)
 
-    sse_event_id = generate_sse_event_id()
+    sse_event_id = generate_sse_event_id(mission_id)
     event_with_id = {
         **event,
         "sse_event_id": sse_event_id
     }
-    event_ring_buffers[mission_id].append(event_with_id)
-    return sse_event_id
+    # Serialize once at publish time; replays to any number of clients reuse the frame
+    frame = _build_sse_frame(sse_event_id.encode(), orjson.dumps(event_with_id))
+    event_ring_buffers[mission_id].append((_seq_counters[mission_id], event_with_id, frame))
+    _snapshot_cache.pop(mission_id, None)
+    return sse_event_id, frame
 
 
-def get_events_after(mission_id: str, last_event_id: Optional[str]) -> List[dict]:
-    """Get all events after the specified Last-Event-ID for replay"""
+def get_events_after(mission_id: str, last_event_id: Optional[str]) -> List[bytes]:
+    """Get the pre-built SSE frames of all events after the specified Last-Event-ID for replay"""
     if mission_id not in event_ring_buffers:
         return []
 
+    buffer = event_ring_buffers[mission_id]
     if not last_event_id:
         # No last event ID - return all buffered events
-        return list(event_ring_buffers[mission_id])
-
-    # Find events after the last_event_id
-    events = list(event_ring_buffers[mission_id])
-    found_index = -1
-    for i, event in enumerate(events):
-        if event.get("sse_event_id") == last_event_id:
-            found_index = i
+        return [frame for _, _, frame in buffer]
+
+    last_seq = parse_sse_event_seq(mission_id, last_event_id)
+    if last_seq is None or last_seq > _seq_counters[mission_id]:
+        # Unknown ID (e.g. issued by an earlier gateway process) - return all buffered events
+        return [frame for _, _, frame in buffer]
+
+    # Missed events are the newest entries - walk from the right until we reach last_seq
+    frames = []
+    for seq, _, frame in reversed(buffer):
+        if seq <= last_seq:
             break
+        frames.append(frame)
+    frames.reverse()
+    return frames
+
+
+def broadcast_nowait(queues: List[asyncio.Queue], event: tuple[dict, bytes]) -> None:
+    """Fan out an (event, SSE frame) pair to subscriber queues without awaiting.
+
+    When a subscriber's queue is full it is lagging: its oldest pending event
+    is dropped to make room, so the producer never blocks on one slow client.
+    """
+    for queue in queues:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            queue.put_nowait(event)
+            logger.warning("subscriber_lagging_event_dropped", queue_size=queue.qsize())
 
-    if found_index >= 0:
-        # Return events after the found index
-        return events[found_index + 1:]
-    else:
-        # Last event ID not found in buffer - return all (might have been evicted)
-        return events
+
+def drain_queue(queue: asyncio.Queue) -> None:
+    """Discard any events still pending in a subscriber queue"""
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
 
 
 async def get_snapshot_for_mission(mission_id: str) -> Optional[dict]:
@@ -213,21 +302,22 @@ async def consume_kafka_events():
                 )
 
                 # P0.5: Add event to ring buffer for replay on reconnect
+                # The SSE frame is serialized once here and forwarded verbatim to SSE clients
                 if run_id:
-                    sse_event_id = add_event_to_ring_buffer(run_id, event)
+                    sse_event_id, frame = add_event_to_ring_buffer(run_id, event)
                     event["sse_event_id"] = sse_event_id
+                else:
+                    frame = _build_sse_frame(b"", orjson.dumps(event))
 
                 if msg.topic == KAFKA_TOPIC_EVENTS:
                     # Dispatch to graph event subscribers
                     if run_id in event_queues:
-                        for queue in event_queues[run_id]:
-                            await queue.put(event)
+                        broadcast_nowait(event_queues[run_id], (event, frame))
                         logger.debug("kafka_event_dispatched", run_id=run_id, queue_count=len(event_queues[run_id]))
                 elif msg.topic == KAFKA_TOPIC_LOGS:
                     # Dispatch to log subscribers
                     if run_id in log_queues:
-                        for queue in log_queues[run_id]:
-                            await queue.put(event)
+                        broadcast_nowait(log_queues[run_id], (event, frame))
                         logger.debug("kafka_log_dispatched", run_id=run_id, queue_count=len(log_queues[run_id]))
 
         except Exception as e:
@@ -625,6 +715,7 @@ class Mutation:
             except Exception as e:
                 results["services"]["orchestrator"] = {"status": "error", "detail": str(e)}
 
+        _snapshot_cache.pop(mission_id, None)
         results["status"] = "deleted"
         return results
 
@@ -672,6 +763,7 @@ class Mutation:
             except Exception as e:
                 results["services"]["orchestrator"] = {"status": "error", "detail": str(e)}
 
+        _snapshot_cache.clear()
         results["status"] = "cleared"
         return results
 
@@ -680,7 +772,7 @@ class Subscription:
     @strawberry.subscription
     async def graph_events(self, run_id: str) -> AsyncGenerator[GraphEvent, None]:
         """Subscribe to real-time graph events for a mission"""
-        queue: asyncio.Queue = asyncio.Queue()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
 
         # Register queue
         if run_id not in event_queues:
@@ -691,7 +783,7 @@ class Subscription:
 
         try:
             while True:
-                event = await queue.get()
+                event, _ = await queue.get()
                 yield GraphEvent(
                     run_id=event.get("run_id", ""),
                     event_type=EventType(event.get("event_type", "node_added")),
@@ -708,7 +800,7 @@ class Subscription:
     @strawberry.subscription
     async def logs(self, run_id: str) -> AsyncGenerator[LogEntry, None]:
         """Subscribe to real-time logs for a mission"""
-        queue: asyncio.Queue = asyncio.Queue()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
 
         # Register queue
         if run_id not in log_queues:
@@ -719,7 +811,7 @@ class Subscription:
 
         try:
             while True:
-                log = await queue.get()
+                log, _ = await queue.get()
                 yield LogEntry(
                     run_id=log.get("run_id", ""),
                     level=log.get("level", "INFO"),
@@ -800,7 +892,8 @@ async def sse_events(
     run_id: str,
     request: Request,
     last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
-    lastEventId: Optional[str] = None  # P0.5-FIX: Also accept as query param for clients that can't set headers
+    lastEventId: Optional[str] = None,  # P0.5-FIX: Also accept as query param for clients that can't set headers
+    compress: bool = False
 ):
     """
     Server-Sent Events endpoint for graph updates and logs.
@@ -809,12 +902,16 @@ async def sse_events(
     On reconnect:
     1. If Last-Event-ID provided: replay missed events from ring buffer
     2. If no Last-Event-ID: send full snapshot first, then stream deltas
+
+    With ?compress=true, frames larger than SSE_COMPRESS_MIN_BYTES are sent as
+    "gz" events whose data is base64-encoded zlib; the client must inflate them.
     """
-    from starlette.responses import StreamingResponse
+    encode = _compress_sse_frame if compress else (lambda frame: frame)
 
     async def event_generator():
-        event_queue: asyncio.Queue = asyncio.Queue()
-        log_queue: asyncio.Queue = asyncio.Queue()
+        event_queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        log_queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        ev_task = log_task = ka_task = None
 
         # Register for both events and logs
         if run_id not in event_queues:
@@ -833,65 +930,77 @@ async def sse_events(
             # P0.5: Handle reconnection with Last-Event-ID
             if effective_last_event_id:
                 # Replay missed events from ring buffer
-                missed_events = get_events_after(run_id, effective_last_event_id)
-                logger.info("sse_replaying_missed_events", run_id=run_id, count=len(missed_events))
-                for event in missed_events:
-                    sse_id = event.get("sse_event_id", "")
-                    yield f"id: {sse_id}\ndata: {json.dumps(event)}\n\n"
+                missed_frames = get_events_after(run_id, effective_last_event_id)
+                logger.info("sse_replaying_missed_events", run_id=run_id, count=len(missed_frames))
+                if missed_frames:
+                    # One chunk -> one socket write for the whole replay
+                    yield b"".join(map(encode, missed_frames))
             else:
-                # First connection - send snapshot
-                snapshot = await get_snapshot_for_mission(run_id)
-                if snapshot:
-                    snapshot_event = {
-                        "type": "snapshot",
-                        "event_type": "SNAPSHOT",
-                        "run_id": run_id,
-                        "payload": snapshot,
-                        "sse_event_id": generate_sse_event_id()
-                    }
-                    yield f"id: {snapshot_event['sse_event_id']}\ndata: {json.dumps(snapshot_event)}\n\n"
-                    logger.info("sse_snapshot_sent", run_id=run_id, nodes=len(snapshot.get("nodes", [])))
+                # First connection - send snapshot (cached until the next event arrives)
+                cached = _snapshot_cache.get(run_id) if kafka_consumer else None
+                if cached and time.monotonic() - cached[0] < SNAPSHOT_CACHE_TTL:
+                    yield encode(cached[1])
+                    logger.info("sse_snapshot_sent", run_id=run_id, cached=True)
+                else:
+                    snapshot = await get_snapshot_for_mission(run_id)
+                    if snapshot:
+                        snapshot_event = {
+                            "type": "snapshot",
+                            "event_type": "SNAPSHOT",
+                            "run_id": run_id,
+                            "payload": snapshot,
+                            "sse_event_id": generate_sse_event_id(run_id)
+                        }
+                        frame = _build_sse_frame(snapshot_event["sse_event_id"].encode(), orjson.dumps(snapshot_event))
+                        _snapshot_cache[run_id] = (time.monotonic(), frame)
+                        yield encode(frame)
+                        logger.info("sse_snapshot_sent", run_id=run_id, nodes=len(snapshot.get("nodes", [])))
 
             # Stream live events
+            # Getter/keepalive tasks persist across iterations; only the one that
+            # completed is re-armed, so no task is created and cancelled per event.
+            ev_task = asyncio.create_task(event_queue.get())
+            log_task = asyncio.create_task(log_queue.get())
+            ka_task = asyncio.create_task(asyncio.sleep(SSE_KEEPALIVE_INTERVAL))
             while True:
                 try:
-                    # Check both queues with timeout
-                    done, pending = await asyncio.wait(
-                        [
-                            asyncio.create_task(event_queue.get()),
-                            asyncio.create_task(log_queue.get())
-                        ],
-                        timeout=15.0,
+                    done, _ = await asyncio.wait(
+                        {ev_task, log_task, ka_task},
                         return_when=asyncio.FIRST_COMPLETED
                     )
 
-                    # Cancel pending tasks
-                    for task in pending:
-                        task.cancel()
-
-                    if done:
-                        for task in done:
-                            try:
-                                data = task.result()
-                                sse_id = data.get("sse_event_id", "")
-                                yield f"id: {sse_id}\ndata: {json.dumps(data)}\n\n"
-                            except asyncio.CancelledError:
-                                pass
-                    else:
-                        # Timeout - send keepalive with ID
-                        keepalive_id = generate_sse_event_id()
-                        yield f"id: {keepalive_id}\ndata: {json.dumps({'type': 'keepalive'})}\n\n"
+                    # Queued frames were serialized upstream - forward them verbatim
+                    if ev_task in done:
+                        _, frame = ev_task.result()
+                        ev_task = asyncio.create_task(event_queue.get())
+                        yield encode(frame)
+                    if log_task in done:
+                        _, frame = log_task.result()
+                        log_task = asyncio.create_task(log_queue.get())
+                        yield encode(frame)
+                    if ka_task in done:
+                        # Send keepalive with ID
+                        ka_task = asyncio.create_task(asyncio.sleep(SSE_KEEPALIVE_INTERVAL))
+                        keepalive_id = generate_sse_event_id(run_id)
+                        yield _KEEPALIVE_FRAME_TEMPLATE % keepalive_id.encode()
 
                 except asyncio.CancelledError:
                     break
         except GeneratorExit:
             pass
         finally:
+            # Cancel long-lived waiters
+            for task in (ev_task, log_task, ka_task):
+                if task is not None:
+                    task.cancel()
+
             # Cleanup subscriptions
             if run_id in event_queues and event_queue in event_queues[run_id]:
                 event_queues[run_id].remove(event_queue)
             if run_id in log_queues and log_queue in log_queues[run_id]:
                 log_queues[run_id].remove(log_queue)
+            drain_queue(event_queue)
+            drain_queue(log_queue)
             logger.info("sse_connection_closed", run_id=run_id)
 
     return StreamingResponse(
@@ -905,24 +1014,62 @@ async def sse_events(
     )
 
 
+# Snapshots with fewer nodes than this are serialized in one shot; larger ones are streamed
+SNAPSHOT_STREAM_MIN_NODES = 256
+SNAPSHOT_STREAM_CHUNK_SIZE = 500  # list items per streamed chunk
+
+
+def _iter_json_array(items: list):
+    """Yield a JSON array in chunks of SNAPSHOT_STREAM_CHUNK_SIZE items"""
+    yield b"["
+    for start in range(0, len(items), SNAPSHOT_STREAM_CHUNK_SIZE):
+        if start:
+            yield b","
+        # Strip the chunk's own brackets so the chunks splice into one array
+        yield orjson.dumps(items[start:start + SNAPSHOT_STREAM_CHUNK_SIZE])[1:-1]
+    yield b"]"
+
+
+def _iter_snapshot_json(run_id: str, snapshot: dict, buffer_status: dict):
+    """Yield the snapshot response body piecewise, streaming large lists (nodes, edges)"""
+    yield b'{"run_id":' + orjson.dumps(run_id) + b',"snapshot":{'
+    for i, (key, value) in enumerate(snapshot.items()):
+        yield (b"," if i else b"") + orjson.dumps(key) + b":"
+        if isinstance(value, list) and len(value) > SNAPSHOT_STREAM_CHUNK_SIZE:
+            yield from _iter_json_array(value)
+        else:
+            yield orjson.dumps(value)
+    yield b'},"buffer":' + orjson.dumps(buffer_status) + b"}"
+
+
 # P0.5: Endpoint to get current snapshot + buffer status
 @app.get("/api/v1/sse/snapshot/{run_id}")
 async def get_sse_snapshot(run_id: str):
     """Get current graph snapshot and ring buffer status for a mission"""
     snapshot = await get_snapshot_for_mission(run_id)
-    buffer_size = len(event_ring_buffers.get(run_id, []))
-
-    return {
-        "run_id": run_id,
-        "snapshot": snapshot,
-        "buffer": {
-            "size": buffer_size,
-            "max_size": RING_BUFFER_SIZE,
-            "oldest_event_id": event_ring_buffers.get(run_id, [{}])[0].get("sse_event_id") if buffer_size > 0 else None,
-            "newest_event_id": event_ring_buffers.get(run_id, [{}])[-1].get("sse_event_id") if buffer_size > 0 else None
-        }
+    buffer = event_ring_buffers.get(run_id)
+    buffer_size = len(buffer) if buffer else 0
+
+    buffer_status = {
+        "size": buffer_size,
+        "max_size": RING_BUFFER_SIZE,
+        "oldest_event_id": buffer[0][1]["sse_event_id"] if buffer_size > 0 else None,
+        "newest_event_id": buffer[-1][1]["sse_event_id"] if buffer_size > 0 else None
     }
 
+    if not snapshot or len(snapshot.get("nodes", [])) < SNAPSHOT_STREAM_MIN_NODES:
+        # Small payload - a single serialization is cheaper than chunked framing
+        return Response(
+            orjson.dumps({"run_id": run_id, "snapshot": snapshot, "buffer": buffer_status}),
+            media_type="application/json"
+        )
+
+    return StreamingResponse(
+        _iter_snapshot_json(run_id, snapshot, buffer_status),
+        media_type="application/json"
+    )
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    # uvloop/httptools (from uvicorn[standard]) cut per-await and HTTP parsing overhead on the SSE fanout path
+    uvicorn.run(app, host="0.0.0.0", port=8080, loop="uvloop", http="httptools")
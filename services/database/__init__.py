@@ -2,15 +2,18 @@
 from .db import (
     init_db,
     get_db,
+    close_db,
     create_mission,
     get_mission,
     update_mission,
     list_missions,
     create_node,
+    create_nodes,
     get_node,
     delete_node,
     query_nodes,
     create_edge,
+    create_edges,
     get_edges,
     get_mission_stats,
     create_log,
@@ -20,15 +23,18 @@ from .db import (
 __all__ = [
     "init_db",
     "get_db",
+    "close_db",
     "create_mission",
     "get_mission",
     "update_mission",
     "list_missions",
     "create_node",
+    "create_nodes",
     "get_node",
     "delete_node",
     "query_nodes",
     "create_edge",
+    "create_edges",
     "get_edges",
     "get_mission_stats",
     "create_log",
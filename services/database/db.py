@@ -3,9 +3,11 @@ Shared Database Module for Gotham Recon Services
 SQLite with async support via aiosqlite
 """
 import aiosqlite
+import asyncio
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Dict, List, Any
 from pathlib import Path
 
@@ -16,15 +18,151 @@ DB_PATH = os.getenv("DATABASE_PATH", str(DB_DIR / "gotham.db"))
 # Ensure data directory exists
 DB_DIR.mkdir(parents=True, exist_ok=True)
 
+# Compact JSON for stored columns: no padding after separators, no ASCII escaping
+_JSON_SEP = (",", ":")
+
+def _to_json(value: Any) -> str:
+    """Serialize a value for a JSON text column"""
+    return json.dumps(value, separators=_JSON_SEP, ensure_ascii=False)
+
+# Long-lived shared connection (opened lazily, reused by every CRUD call)
+_db: Optional[aiosqlite.Connection] = None
+_connect_lock = asyncio.Lock()
+# SQLite is single-writer: serialize execute+commit pairs on the shared connection
+_write_lock = asyncio.Lock()
+
 async def get_db() -> aiosqlite.Connection:
-    """Get database connection"""
-    db = await aiosqlite.connect(DB_PATH)
-    db.row_factory = aiosqlite.Row
-    return db
+    """Get the shared database connection, opening it on first use"""
+    global _db
+    if _db is None:
+        async with _connect_lock:
+            if _db is None:
+                db = await aiosqlite.connect(DB_PATH)
+                # page_size only takes effect on a fresh database, so it must precede WAL
+                await db.executescript("""
+                    PRAGMA page_size=8192;
+                    PRAGMA journal_mode=WAL;
+                    PRAGMA synchronous=NORMAL;
+                    PRAGMA temp_store=MEMORY;
+                    PRAGMA mmap_size=268435456;
+                    PRAGMA cache_size=-65536;
+                """)
+                db.row_factory = aiosqlite.Row
+                _db = db
+    return _db
+
+async def close_db():
+    """Flush pending group-commit writes and close the shared database connection"""
+    global _db, _flusher_task
+    if _flusher_task is not None:
+        await _write_queue.join()
+        _flusher_task.cancel()
+        _flusher_task = None
+    if _db is not None:
+        await _db.close()
+        _db = None
+
+# Group commit: small hot-path writes (logs, nodes, edges) are queued and a single
+# background flusher applies everything pending in one transaction, so one commit
+# (and one fsync) is amortized over many rows. The flusher does not wait to fill a
+# batch: writes arriving while a commit is in flight simply make up the next one.
+GROUP_COMMIT_MAX_ROWS = 500
+_write_queue: Optional[asyncio.Queue] = None
+_flusher_task: Optional[asyncio.Task] = None
+
+_INSERT_NODE_SQL = """
+    INSERT OR REPLACE INTO nodes (id, type, mission_id, properties, risk_score, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_EDGE_SQL = """
+    INSERT OR IGNORE INTO edges (from_node, to_node, relation, mission_id, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_INSERT_LOG_SQL = """
+    INSERT INTO logs (mission_id, level, phase, message, metadata, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+async def _enqueue_write(sql: str, params: tuple):
+    """Queue a write for the group-commit flusher and wait until it is committed"""
+    global _write_queue, _flusher_task
+    if _flusher_task is None or _flusher_task.done():
+        _write_queue = asyncio.Queue()
+        _flusher_task = asyncio.create_task(_group_commit_flusher(_write_queue))
+        # Runs even if the task is cancelled before it ever starts
+        _flusher_task.add_done_callback(lambda _task, queue=_write_queue: _fail_pending_writes(queue, []))
+    future = asyncio.get_running_loop().create_future()
+    _write_queue.put_nowait((sql, params, future))
+    await future
+
+async def _commit_batch(db: aiosqlite.Connection, batch: List[tuple]):
+    """Apply a batch of queued writes in one transaction (caller holds _write_lock)"""
+    # Group rows per statement (insertion order preserves per-table write order)
+    grouped: Dict[str, List[tuple]] = {}
+    for sql, params, _ in batch:
+        grouped.setdefault(sql, []).append(params)
+    try:
+        for sql, rows in grouped.items():
+            await db.executemany(sql, rows)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+async def _group_commit_flusher(queue: asyncio.Queue):
+    """Background task: drain queued writes and commit them as one transaction"""
+    batch: List[tuple] = []
+    try:
+        db = await get_db()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < GROUP_COMMIT_MAX_ROWS and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            async with _write_lock:
+                try:
+                    await _commit_batch(db, batch)
+                    results = [None] * len(batch)
+                except Exception:
+                    # One bad row must not fail the unrelated writes grouped with it:
+                    # replay the batch row by row so only the failing caller gets the error
+                    results = []
+                    for item in batch:
+                        try:
+                            await _commit_batch(db, [item])
+                            results.append(None)
+                        except Exception as e:
+                            results.append(e)
+
+            for (_, _, future), error in zip(batch, results):
+                if not future.done():
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+            for _ in batch:
+                queue.task_done()
+            batch = []
+    finally:
+        _fail_pending_writes(queue, batch)
+
+def _fail_pending_writes(queue: asyncio.Queue, batch: List[tuple]):
+    """Fail the in-flight batch and everything still queued: the flusher has stopped, so no
+    caller may be left waiting on a write it will never make"""
+    error = RuntimeError("group-commit flusher stopped")
+    while not queue.empty():
+        batch.append(queue.get_nowait())
+    for _, _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+    for _ in batch:
+        queue.task_done()
+    batch.clear()
 
 async def init_db():
     """Initialize database tables"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    db = await get_db()
+    async with _write_lock:
         # Missions table
         await db.execute("""
             CREATE TABLE IF NOT EXISTS missions (
@@ -48,12 +186,22 @@ async def init_db():
                 type TEXT NOT NULL,
                 mission_id TEXT NOT NULL,
                 properties TEXT,
+                risk_score INTEGER DEFAULT 0,
                 created_at TEXT NOT NULL,
                 updated_at TEXT NOT NULL,
                 FOREIGN KEY (mission_id) REFERENCES missions(id)
             )
         """)
 
+        # Migrate databases created before risk_score was lifted out of properties
+        async with db.execute("PRAGMA table_info(nodes)") as cursor:
+            node_columns = {row[1] async for row in cursor}
+        if "risk_score" not in node_columns:
+            await db.execute("ALTER TABLE nodes ADD COLUMN risk_score INTEGER DEFAULT 0")
+            await db.execute(
+                "UPDATE nodes SET risk_score = COALESCE(json_extract(properties, '$.risk_score'), 0)"
+            )
+
         # Edges table
         await db.execute("""
             CREATE TABLE IF NOT EXISTS edges (
@@ -87,14 +235,37 @@ async def init_db():
         await db.execute("CREATE INDEX IF NOT EXISTS idx_edges_mission ON edges(mission_id)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_logs_mission ON logs(mission_id)")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes(type)")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_nodes_risk ON nodes(mission_id, risk_score)")
+        # Compound indexes matching the mission-scoped hot queries
+        await db.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_nodes_mission_type ON nodes(mission_id, type, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_edges_mission_from ON edges(mission_id, from_node);
+            CREATE INDEX IF NOT EXISTS idx_logs_mission_ts ON logs(mission_id, timestamp DESC);
+        """)
 
         await db.commit()
         print(f"[DB] Database initialized at {DB_PATH}")
 
 # Mission CRUD
+def _mission_from_row(row) -> Dict:
+    """Build a mission dict from a missions row"""
+    return {
+        "id": row["id"],
+        "target_domain": row["target_domain"],
+        "mode": row["mode"],
+        "status": row["status"],
+        "current_phase": row["current_phase"],
+        "seed_subdomains": json.loads(row["seed_subdomains"] or "[]"),
+        "options": json.loads(row["options"] or "{}"),
+        "progress": json.loads(row["progress"] or "{}"),
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"]
+    }
+
 async def create_mission(mission_data: Dict) -> Dict:
     """Create a new mission"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    db = await get_db()
+    async with _write_lock:
         await db.execute("""
             INSERT INTO missions (id, target_domain, mode, status, current_phase, seed_subdomains, options, progress, created_at, updated_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -104,9 +275,9 @@ async def create_mission(mission_data: Dict) -> Dict:
             mission_data.get("mode", "aggressive"),
             mission_data.get("status", "pending"),
             mission_data.get("current_phase"),
-            json.dumps(mission_data.get("seed_subdomains", [])),
-            json.dumps(mission_data.get("options", {})),
-            json.dumps(mission_data.get("progress", {})),
+            _to_json(mission_data.get("seed_subdomains", [])),
+            _to_json(mission_data.get("options", {})),
+            _to_json(mission_data.get("progress", {})),
             mission_data["created_at"],
             mission_data["updated_at"]
         ))
@@ -115,225 +286,242 @@ async def create_mission(mission_data: Dict) -> Dict:
 
 async def get_mission(mission_id: str) -> Optional[Dict]:
     """Get a mission by ID"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM missions WHERE id = ?", (mission_id,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return {
-                    "id": row["id"],
-                    "target_domain": row["target_domain"],
-                    "mode": row["mode"],
-                    "status": row["status"],
-                    "current_phase": row["current_phase"],
-                    "seed_subdomains": json.loads(row["seed_subdomains"] or "[]"),
-                    "options": json.loads(row["options"] or "{}"),
-                    "progress": json.loads(row["progress"] or "{}"),
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"]
-                }
+    db = await get_db()
+    async with db.execute("SELECT * FROM missions WHERE id = ?", (mission_id,)) as cursor:
+        row = await cursor.fetchone()
+        if row:
+            return _mission_from_row(row)
     return None
 
 async def update_mission(mission_id: str, updates: Dict) -> Optional[Dict]:
     """Update a mission"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    db = await get_db()
+    async with _write_lock:
         set_clauses = []
         values = []
         for key, value in updates.items():
             if key in ["progress", "options", "seed_subdomains"]:
-                value = json.dumps(value)
+                value = _to_json(value)
             set_clauses.append(f"{key} = ?")
             values.append(value)
 
         values.append(datetime.utcnow().isoformat())
         values.append(mission_id)
 
-        await db.execute(
-            f"UPDATE missions SET {', '.join(set_clauses)}, updated_at = ? WHERE id = ?",
+        # RETURNING hands back the updated row, so no second SELECT is needed
+        async with db.execute(
+            f"UPDATE missions SET {', '.join(set_clauses)}, updated_at = ? WHERE id = ? RETURNING *",
             values
-        )
+        ) as cursor:
+            row = await cursor.fetchone()
         await db.commit()
-    return await get_mission(mission_id)
+    return _mission_from_row(row) if row else None
 
 async def list_missions(limit: int = 20, offset: int = 0) -> tuple[List[Dict], int]:
     """List missions with pagination"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    db = await get_db()
+    # Page and total count in one pass via a window aggregate
+    async with db.execute(
+        "SELECT *, COUNT(*) OVER() as cnt FROM missions ORDER BY created_at DESC LIMIT ? OFFSET ?",
+        (limit, offset)
+    ) as cursor:
+        missions = []
+        total = 0
+        async for row in cursor:
+            total = row["cnt"]
+            missions.append(_mission_from_row(row))
 
-        # Get total count
+    if not missions and offset > 0:
+        # Page past the end carries no rows to read the count from
         async with db.execute("SELECT COUNT(*) as cnt FROM missions") as cursor:
             row = await cursor.fetchone()
             total = row["cnt"]
-
-        # Get missions
-        async with db.execute(
-            "SELECT * FROM missions ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            (limit, offset)
-        ) as cursor:
-            missions = []
-            async for row in cursor:
-                missions.append({
-                    "id": row["id"],
-                    "target_domain": row["target_domain"],
-                    "mode": row["mode"],
-                    "status": row["status"],
-                    "current_phase": row["current_phase"],
-                    "seed_subdomains": json.loads(row["seed_subdomains"] or "[]"),
-                    "options": json.loads(row["options"] or "{}"),
-                    "progress": json.loads(row["progress"] or "{}"),
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"]
-                })
     return missions, total
 
 # Node CRUD
 async def create_node(node_data: Dict) -> Dict:
-    """Create or update a node"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            INSERT OR REPLACE INTO nodes (id, type, mission_id, properties, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            node_data["id"],
-            node_data["type"],
-            node_data["mission_id"],
-            json.dumps(node_data.get("properties", {})),
-            node_data.get("created_at", datetime.utcnow().isoformat()),
-            datetime.utcnow().isoformat()
-        ))
-        await db.commit()
+    """Create or update a node (group-committed)"""
+    await _enqueue_write(_INSERT_NODE_SQL, (
+        node_data["id"],
+        node_data["type"],
+        node_data["mission_id"],
+        _to_json(node_data.get("properties", {})),
+        node_data.get("properties", {}).get("risk_score", 0),
+        node_data.get("created_at", datetime.utcnow().isoformat()),
+        datetime.utcnow().isoformat()
+    ))
     return node_data
 
+async def create_nodes(nodes: List[Dict]) -> List[Dict]:
+    """Create or update many nodes with a single executemany + commit"""
+    if not nodes:
+        return nodes
+    now = datetime.utcnow().isoformat()
+    rows = [
+        (
+            node["id"],
+            node["type"],
+            node["mission_id"],
+            _to_json(node.get("properties", {})),
+            node.get("properties", {}).get("risk_score", 0),
+            node.get("created_at", now),
+            now
+        )
+        for node in nodes
+    ]
+    db = await get_db()
+    async with _write_lock:
+        await db.executemany(_INSERT_NODE_SQL, rows)
+        await db.commit()
+    return nodes
+
 async def get_node(node_id: str) -> Optional[Dict]:
     """Get a node by ID"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM nodes WHERE id = ?", (node_id,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return {
-                    "id": row["id"],
-                    "type": row["type"],
-                    "mission_id": row["mission_id"],
-                    "properties": json.loads(row["properties"] or "{}"),
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"]
-                }
+    db = await get_db()
+    async with db.execute("SELECT * FROM nodes WHERE id = ?", (node_id,)) as cursor:
+        row = await cursor.fetchone()
+        if row:
+            return {
+                "id": row["id"],
+                "type": row["type"],
+                "mission_id": row["mission_id"],
+                "properties": json.loads(row["properties"] or "{}"),
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"]
+            }
     return None
 
 async def delete_node(node_id: str) -> bool:
     """Delete a node"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    db = await get_db()
+    async with _write_lock:
         await db.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
         await db.execute("DELETE FROM edges WHERE from_node = ? OR to_node = ?", (node_id, node_id))
         await db.commit()
     return True
 
+@lru_cache(maxsize=None)
+def _query_nodes_sql(has_types: bool, has_risk: bool) -> tuple[str, str]:
+    """Build the (count, select) SQL for query_nodes.
+
+    The type filter binds the whole list as one JSON parameter, so the SQL text
+    only depends on which filters are present and the connection's statement
+    cache reuses the compiled statements regardless of how many types are passed.
+    """
+    where_clauses = ["mission_id = ?"]
+    if has_types:
+        where_clauses.append("type IN (SELECT value FROM json_each(?))")
+    if has_risk:
+        where_clauses.append("risk_score >= ?")
+    where_sql = " AND ".join(where_clauses)
+    return (
+        f"SELECT COUNT(*) as cnt FROM nodes WHERE {where_sql}",
+        f"SELECT * FROM nodes WHERE {where_sql} ORDER BY created_at DESC LIMIT ? OFFSET ?"
+    )
+
 async def query_nodes(mission_id: str, node_types: List[str] = None, risk_score_min: int = None, limit: int = 100, offset: int = 0) -> tuple[List[Dict], int]:
     """Query nodes with filters"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-
-        where_clauses = ["mission_id = ?"]
-        params = [mission_id]
-
-        if node_types:
-            placeholders = ",".join(["?" for _ in node_types])
-            where_clauses.append(f"type IN ({placeholders})")
-            params.extend(node_types)
-
-        where_sql = " AND ".join(where_clauses)
-
-        # Get total
-        async with db.execute(f"SELECT COUNT(*) as cnt FROM nodes WHERE {where_sql}", params) as cursor:
-            row = await cursor.fetchone()
-            total = row["cnt"]
-
-        # Get nodes
-        params.extend([limit, offset])
-        async with db.execute(
-            f"SELECT * FROM nodes WHERE {where_sql} ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            params
-        ) as cursor:
-            nodes = []
-            async for row in cursor:
-                node = {
-                    "id": row["id"],
-                    "type": row["type"],
-                    "mission_id": row["mission_id"],
-                    "properties": json.loads(row["properties"] or "{}"),
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"]
-                }
-                # Filter by risk_score if specified
-                if risk_score_min is not None:
-                    if node["properties"].get("risk_score", 0) < risk_score_min:
-                        continue
-                nodes.append(node)
+    db = await get_db()
+    count_sql, select_sql = _query_nodes_sql(bool(node_types), risk_score_min is not None)
+
+    params = [mission_id]
+    if node_types:
+        params.append(_to_json(list(node_types)))
+    if risk_score_min is not None:
+        params.append(risk_score_min)
+
+    # Get total
+    async with db.execute(count_sql, params) as cursor:
+        row = await cursor.fetchone()
+        total = row["cnt"]
+
+    # Get nodes
+    params.extend([limit, offset])
+    async with db.execute(select_sql, params) as cursor:
+        nodes = []
+        async for row in cursor:
+            nodes.append({
+                "id": row["id"],
+                "type": row["type"],
+                "mission_id": row["mission_id"],
+                "properties": json.loads(row["properties"] or "{}"),
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"]
+            })
     return nodes, total
 
 # Edge CRUD
 async def create_edge(edge_data: Dict) -> Dict:
-    """Create an edge"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        try:
-            await db.execute("""
-                INSERT INTO edges (from_node, to_node, relation, mission_id, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                edge_data["from_node"],
-                edge_data["to_node"],
-                edge_data["relation"],
-                edge_data["mission_id"],
-                edge_data.get("created_at", datetime.utcnow().isoformat())
-            ))
-            await db.commit()
-        except aiosqlite.IntegrityError:
-            pass  # Edge already exists
+    """Create an edge (group-committed; existing edges are ignored)"""
+    await _enqueue_write(_INSERT_EDGE_SQL, (
+        edge_data["from_node"],
+        edge_data["to_node"],
+        edge_data["relation"],
+        edge_data["mission_id"],
+        edge_data.get("created_at", datetime.utcnow().isoformat())
+    ))
     return edge_data
 
+async def create_edges(edges: List[Dict]) -> List[Dict]:
+    """Create many edges with a single executemany + commit (existing edges are ignored)"""
+    if not edges:
+        return edges
+    now = datetime.utcnow().isoformat()
+    rows = [
+        (
+            edge["from_node"],
+            edge["to_node"],
+            edge["relation"],
+            edge["mission_id"],
+            edge.get("created_at", now)
+        )
+        for edge in edges
+    ]
+    db = await get_db()
+    async with _write_lock:
+        await db.executemany(_INSERT_EDGE_SQL, rows)
+        await db.commit()
+    return edges
+
 async def get_edges(mission_id: str) -> List[Dict]:
     """Get all edges for a mission"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(
-            "SELECT * FROM edges WHERE mission_id = ?",
-            (mission_id,)
-        ) as cursor:
-            edges = []
-            async for row in cursor:
-                edges.append({
-                    "from_node": row["from_node"],
-                    "to_node": row["to_node"],
-                    "relation": row["relation"],
-                    "mission_id": row["mission_id"],
-                    "created_at": row["created_at"]
-                })
+    db = await get_db()
+    async with db.execute(
+        "SELECT * FROM edges WHERE mission_id = ?",
+        (mission_id,)
+    ) as cursor:
+        edges = []
+        async for row in cursor:
+            edges.append({
+                "from_node": row["from_node"],
+                "to_node": row["to_node"],
+                "relation": row["relation"],
+                "mission_id": row["mission_id"],
+                "created_at": row["created_at"]
+            })
     return edges
 
 async def get_mission_stats(mission_id: str) -> Dict:
     """Get statistics for a mission"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-
-        # Total nodes
-        async with db.execute("SELECT COUNT(*) as cnt FROM nodes WHERE mission_id = ?", (mission_id,)) as cursor:
-            row = await cursor.fetchone()
-            total_nodes = row["cnt"]
-
-        # Total edges
-        async with db.execute("SELECT COUNT(*) as cnt FROM edges WHERE mission_id = ?", (mission_id,)) as cursor:
-            row = await cursor.fetchone()
-            total_edges = row["cnt"]
-
-        # Nodes by type
-        async with db.execute(
-            "SELECT type, COUNT(*) as cnt FROM nodes WHERE mission_id = ? GROUP BY type",
-            (mission_id,)
-        ) as cursor:
-            nodes_by_type = {}
-            async for row in cursor:
-                nodes_by_type[row["type"]] = row["cnt"]
+    db = await get_db()
+    # Total nodes
+    async with db.execute("SELECT COUNT(*) as cnt FROM nodes WHERE mission_id = ?", (mission_id,)) as cursor:
+        row = await cursor.fetchone()
+        total_nodes = row["cnt"]
+
+    # Total edges
+    async with db.execute("SELECT COUNT(*) as cnt FROM edges WHERE mission_id = ?", (mission_id,)) as cursor:
+        row = await cursor.fetchone()
+        total_edges = row["cnt"]
+
+    # Nodes by type
+    async with db.execute(
+        "SELECT type, COUNT(*) as cnt FROM nodes WHERE mission_id = ? GROUP BY type",
+        (mission_id,)
+    ) as cursor:
+        nodes_by_type = {}
+        async for row in cursor:
+            nodes_by_type[row["type"]] = row["cnt"]
 
     return {
         "mission_id": mission_id,
@@ -344,38 +532,32 @@ async def get_mission_stats(mission_id: str) -> Dict:
 
 # Log functions
 async def create_log(log_data: Dict) -> Dict:
-    """Create a log entry"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            INSERT INTO logs (mission_id, level, phase, message, metadata, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            log_data["mission_id"],
-            log_data["level"],
-            log_data.get("phase", ""),
-            log_data["message"],
-            json.dumps(log_data.get("metadata", {})),
-            log_data.get("timestamp", datetime.utcnow().isoformat())
-        ))
-        await db.commit()
+    """Create a log entry (group-committed)"""
+    await _enqueue_write(_INSERT_LOG_SQL, (
+        log_data["mission_id"],
+        log_data["level"],
+        log_data.get("phase", ""),
+        log_data["message"],
+        _to_json(log_data.get("metadata", {})),
+        log_data.get("timestamp", datetime.utcnow().isoformat())
+    ))
     return log_data
 
 async def get_logs(mission_id: str, limit: int = 100) -> List[Dict]:
     """Get logs for a mission"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(
-            "SELECT * FROM logs WHERE mission_id = ? ORDER BY timestamp DESC LIMIT ?",
-            (mission_id, limit)
-        ) as cursor:
-            logs = []
-            async for row in cursor:
-                logs.append({
-                    "mission_id": row["mission_id"],
-                    "level": row["level"],
-                    "phase": row["phase"],
-                    "message": row["message"],
-                    "metadata": json.loads(row["metadata"] or "{}"),
-                    "timestamp": row["timestamp"]
-                })
+    db = await get_db()
+    async with db.execute(
+        "SELECT * FROM logs WHERE mission_id = ? ORDER BY timestamp DESC LIMIT ?",
+        (mission_id, limit)
+    ) as cursor:
+        logs = []
+        async for row in cursor:
+            logs.append({
+                "mission_id": row["mission_id"],
+                "level": row["level"],
+                "phase": row["phase"],
+                "message": row["message"],
+                "metadata": json.loads(row["metadata"] or "{}"),
+                "timestamp": row["timestamp"]
+            })
     return logs
@@ -4,22 +4,70 @@ Full implementation with endpoint_heuristics engine
 """
 import os
 import re
+import sys
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional, Tuple
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
 import httpx
+import orjson
 import structlog
 
+# Aho-Corasick multi-pattern matcher (optional - falls back to substring scans)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
 logger = structlog.get_logger()
-app = FastAPI(title="Endpoint Intel", version="2.0.0")
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 # Service URLs
 GRAPH_SERVICE = os.getenv("GRAPH_SERVICE_URL", "http://graph-service:8001")
 
+# Request bodies are pre-serialized with orjson
+JSON_HEADERS = {"content-type": "application/json"}
+
+# Max endpoints enriched/published concurrently
+ENDPOINT_CONCURRENCY = int(os.getenv("ENDPOINT_INTEL_CONCURRENCY", "50"))
+# Queued nodes + edges that trigger a bulk publish to graph-service
+BULK_PUBLISH_SIZE = 500
+# Endpoints per enrichment batch, and worker processes scoring batches
+ENRICH_BATCH_SIZE = 500
+ENRICH_WORKERS = int(os.getenv("ENDPOINT_INTEL_WORKERS", str(os.cpu_count() or 1)))
+
+# Process pool for CPU-bound enrichment (created on first run)
+_enrich_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_enrich_executor() -> ProcessPoolExecutor:
+    global _enrich_executor
+    if _enrich_executor is None:
+        _enrich_executor = ProcessPoolExecutor(max_workers=ENRICH_WORKERS)
+    return _enrich_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown lifecycle"""
+    global _enrich_executor
+    yield
+    if _enrich_executor is not None:
+        _enrich_executor.shutdown(cancel_futures=True)
+        _enrich_executor = None
+
+
+app = FastAPI(title="Endpoint Intel", version="2.0.0", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
 
 class ExecuteRequest(BaseModel):
     mission_id: str
@@ -53,137 +101,233 @@ RISK_POLICY = {
     },
 }
 
-
-def categorize_endpoint(path: str, method: str = "GET", extension: str = None) -> str:
+# Risk policy weights resolved once (compute_prescores runs per endpoint)
+_SCORE_CATEGORY_ADMIN = RISK_POLICY["pre_score_weights"].get("category_admin", 10)
+_SCORE_CATEGORY_AUTH = RISK_POLICY["pre_score_weights"].get("category_auth", 10)
+_SCORE_CATEGORY_API = RISK_POLICY["pre_score_weights"].get("category_api", 8)
+_SCORE_LEGACY_EXTENSION = RISK_POLICY["pre_score_weights"].get("legacy_extension", 4)
+_SCORE_STATE_CHANGING = RISK_POLICY["likelihood_factors"].get("state_changing_method", 3)
+_SCORE_HISTORICAL_ENDPOINT = RISK_POLICY["likelihood_factors"].get("historical_endpoint", 3)
+_SCORE_TOKEN_PARAM = RISK_POLICY["impact_factors"].get("token_param", 4)
+_SCORE_ID_PARAM = RISK_POLICY["impact_factors"].get("id_param", 3)
+_SCORE_CRITICAL_PARAM = RISK_POLICY["impact_factors"].get("has_critical_param", 3)
+
+
+# Path substring patterns per category, in match priority order
+CATEGORY_PATTERNS = (
+    ("API", ("/api/", "/api_", "/rest/", "/graphql", "/v1/", "/v2/", "/v3/", "/json", "/xml",
+             "api.", "/node/", "/rpc/", "/service/", "/endpoint/", "/data/", "/query/")),
+    ("ADMIN", ("/admin", "/portal", "/console", "/dashboard", "/manage", "/backend", "/control",
+               "/cms/", "/edit/", "/config", "/settings", "/panel", "/wp-admin", "/phpmyadmin")),
+    ("AUTH", ("/auth", "/login", "/logout", "/sso", "/oauth", "/signin", "/signup", "/register",
+              "/password", "/forgot", "/session", "/user/", "/account", "/membre", "/inscription")),
+    ("HEALTHCHECK", ("/health", "/ping", "/status", "/_health", "/ready", "/live")),
+)
+
+# Extension sets (static assets win over path patterns, legacy only over healthcheck)
+STATIC_EXTENSIONS = frozenset({".css", ".js", ".png", ".jpg", ".gif", ".ico", ".woff", ".woff2", ".svg"})
+LEGACY_EXTENSIONS = frozenset({".php", ".asp", ".aspx", ".jsp", ".cgi", ".pl", ".swf"})
+
+
+# Other path substrings used by the auth / tech-stack heuristics
+PUBLIC_PATH_PATTERNS = ("/.well-known/", "/public/", "/static/", "/assets/", "/favicon", "/robots.txt")
+OPEN_AUTH_PATH_PATTERNS = ("/login", "/signin", "/signup", "/register")
+TECH_PATH_PATTERNS = (
+    ("WordPress/PHP", ("/wp-", "/wordpress")),
+    ("Drupal/PHP", ("/drupal",)),
+    ("GraphQL", ("/graphql",)),
+    ("REST API", ("/api/v",)),
+)
+
+# Path feature bits: one per category, then public / open-auth, then one per tech stack
+_CATEGORY_BITS = tuple((category, 1 << i) for i, (category, _) in enumerate(CATEGORY_PATTERNS))
+_PUBLIC_BIT = 1 << len(CATEGORY_PATTERNS)
+_OPEN_AUTH_BIT = _PUBLIC_BIT << 1
+_TECH_BITS = tuple((stack, _OPEN_AUTH_BIT << (i + 1)) for i, (stack, _) in enumerate(TECH_PATH_PATTERNS))
+
+
+def _build_path_feature_table() -> Dict[str, int]:
+    """Map every heuristic path substring to the OR of the feature bits it sets."""
+    table: Dict[str, int] = {}
+
+    def add(patterns, bit):
+        for pattern in patterns:
+            table[pattern] = table.get(pattern, 0) | bit
+
+    for (_, patterns), (_, bit) in zip(CATEGORY_PATTERNS, _CATEGORY_BITS):
+        add(patterns, bit)
+    add(PUBLIC_PATH_PATTERNS, _PUBLIC_BIT)
+    add(OPEN_AUTH_PATH_PATTERNS, _OPEN_AUTH_BIT)
+    for (_, patterns), (_, bit) in zip(TECH_PATH_PATTERNS, _TECH_BITS):
+        add(patterns, bit)
+    return table
+
+
+def _build_path_automaton(table: Dict[str, int]):
+    """Build one automaton over all path patterns; payload is the pattern's feature bits."""
+    automaton = ahocorasick.Automaton()
+    for pattern, bits in table.items():
+        automaton.add_word(pattern, bits)
+    automaton.make_automaton()
+    return automaton
+
+
+_PATH_FEATURES = _build_path_feature_table()
+_PATH_AC = _build_path_automaton(_PATH_FEATURES) if AHOCORASICK_AVAILABLE else None
+
+
+def _path_features(path_lower: str) -> int:
+    """Scan a lowercased path once and return the bitmask of heuristic features it matches."""
+    features = 0
+    if _PATH_AC is not None:
+        for _, bits in _PATH_AC.iter(path_lower):
+            features |= bits
+        return features
+
+    for pattern, bits in _PATH_FEATURES.items():
+        if pattern in path_lower:
+            features |= bits
+    return features
+
+
+def categorize_endpoint(path: str, method: str = "GET", extension: str = None, features: int = None) -> str:
     """
     Determine endpoint category from path, method, and extension.
     Returns: API, ADMIN, AUTH, LEGACY, HEALTHCHECK, STATIC, PUBLIC, or UNKNOWN
     """
-    path_lower = path.lower() if path else ""
 
     # Static assets (lowest priority)
-    static_extensions = {".css", ".js", ".png", ".jpg", ".gif", ".ico", ".woff", ".woff2", ".svg"}
-    if extension and extension.lower() in static_extensions:
+    if extension and extension.lower() in STATIC_EXTENSIONS:
         return "STATIC"
 
-    # API detection
-    api_patterns = ["/api/", "/api_", "/rest/", "/graphql", "/v1/", "/v2/", "/v3/", "/json", "/xml",
-                    "api.", "/node/", "/rpc/", "/service/", "/endpoint/", "/data/", "/query/"]
-    if any(p in path_lower for p in api_patterns):
-        return "API"
-
-    # Admin detection
-    admin_patterns = ["/admin", "/portal", "/console", "/dashboard", "/manage", "/backend", "/control",
-                      "/cms/", "/edit/", "/config", "/settings", "/panel", "/wp-admin", "/phpmyadmin"]
-    if any(p in path_lower for p in admin_patterns):
-        return "ADMIN"
-
-    # Auth detection
-    auth_patterns = ["/auth", "/login", "/logout", "/sso", "/oauth", "/signin", "/signup", "/register",
-                     "/password", "/forgot", "/session", "/user/", "/account", "/membre", "/inscription"]
-    if any(p in path_lower for p in auth_patterns):
-        return "AUTH"
-
-    # Legacy detection
-    legacy_extensions = {".php", ".asp", ".aspx", ".jsp", ".cgi", ".pl", ".swf"}
-    if extension and extension.lower() in legacy_extensions:
+    # API / admin / auth / healthcheck detection (first category in priority order)
+    if features is None:
+        features = _path_features(path.lower() if path else "")
+    matched = None
+    for category, bit in _CATEGORY_BITS:
+        if features & bit:
+            matched = category
+            break
+    if matched in ("API", "ADMIN", "AUTH"):
+        return matched
+
+    # Legacy detection (takes precedence over healthcheck patterns)
+    if extension and extension.lower() in LEGACY_EXTENSIONS:
         return "LEGACY"
 
-    # Healthcheck detection
-    health_patterns = ["/health", "/ping", "/status", "/_health", "/ready", "/live"]
-    if any(p in path_lower for p in health_patterns):
+    if matched == "HEALTHCHECK":
         return "HEALTHCHECK"
 
     return "UNKNOWN"
 
 
-def extract_parameters(url: str, path: str) -> List[Dict]:
+# Shared parameter field values (one object each across all parameter dicts)
+_LOC_QUERY = sys.intern("query")
+_LOC_PATH = sys.intern("path")
+_HINT_TOKEN = sys.intern("token")
+_HINT_ID = sys.intern("id")
+_HINT_STRING = sys.intern("string")
+_SENS_HIGH = sys.intern("HIGH")
+_SENS_MEDIUM = sys.intern("MEDIUM")
+_SENS_LOW = sys.intern("LOW")
+_NUMERIC_ID_NAME = sys.intern("_numeric_id")
+
+# One extracted parameter (immutable; converted with _asdict() when published)
+Param = namedtuple("Param", "name location datatype_hint sensitivity is_critical")
+
+# Path parameter patterns (compiled once)
+_PATH_PARAM_RE = re.compile(r'\{([^}]+)\}')  # /{id}, /{user_id}
+_NUMERIC_ID_RE = re.compile(r'/(\d+)(?:/|$)')  # /users/123
+
+
+def _url_query(url: str) -> str:
+    """Return the query string of a URL ('' if it cannot be parsed)."""
+    try:
+        return urlparse(url).query
+    except Exception:
+        return ""
+
+
+def extract_parameters(url: str, path: str) -> List[Param]:
     """
     Extract parameters from URL query string and path patterns.
     """
+    return _extract_parameters(_url_query(url), path)
+
+
+def _extract_parameters(query: str, path: str) -> List[Param]:
+    """extract_parameters on an already-split query string."""
     params = []
 
     # 1. Parse query string
     try:
-        parsed = urlparse(url)
-        query_params = parse_qs(parsed.query)
+        query_params = parse_qs(query)
         for name in query_params.keys():
-            param_info = _classify_param(name, "query")
+            param_info = _classify_param(name, _LOC_QUERY)
             params.append(param_info)
     except Exception:
         pass
 
     # 2. Extract path parameters (patterns like /{id}, /{user_id})
-    path_param_pattern = r'\{([^}]+)\}'
-    matches = re.findall(path_param_pattern, path)
-    for name in matches:
-        param_info = _classify_param(name, "path")
+    for name in _PATH_PARAM_RE.findall(path):
+        param_info = _classify_param(name, _LOC_PATH)
         params.append(param_info)
 
     # 3. Detect numeric IDs in path (e.g., /users/123)
-    numeric_pattern = r'/(\d{1,})(?:/|$)'
-    if re.search(numeric_pattern, path):
-        params.append({
-            "name": "_numeric_id",
-            "location": "path",
-            "datatype_hint": "id",
-            "sensitivity": "MEDIUM",
-            "is_critical": False,
-        })
+    if _NUMERIC_ID_RE.search(path):
+        params.append(Param(_NUMERIC_ID_NAME, _LOC_PATH, _HINT_ID, _SENS_MEDIUM, False))
 
     return params
 
 
-def _classify_param(name: str, location: str) -> Dict:
+# Parameter-name substrings per sensitivity, each matched as one regex alternation
+_HIGH_SENS_RE = re.compile("|".join(map(re.escape, (
+    "token", "key", "secret", "password", "pwd", "auth", "session", "api_key", "apikey", "access_token", "bearer",
+))))
+_ID_SENS_RE = re.compile("|".join(map(re.escape, (
+    "id", "user_id", "account_id", "uid", "email", "username", "phone", "user", "account",
+))))
+
+
+def _classify_param(name: str, location: str) -> Param:
     """Classify a parameter based on its name."""
+    name = sys.intern(name)
     name_lower = name.lower()
 
     # High sensitivity patterns
-    high_sens = ["token", "key", "secret", "password", "pwd", "auth", "session", "api_key", "apikey", "access_token", "bearer"]
-    if any(p in name_lower for p in high_sens):
-        return {
-            "name": name,
-            "location": location,
-            "datatype_hint": "token",
-            "sensitivity": "HIGH",
-            "is_critical": True,
-        }
+    if _HIGH_SENS_RE.search(name_lower):
+        return Param(name, location, _HINT_TOKEN, _SENS_HIGH, True)
 
     # Medium sensitivity (ID patterns)
-    id_patterns = ["id", "user_id", "account_id", "uid", "email", "username", "phone", "user", "account"]
-    if any(p in name_lower for p in id_patterns):
-        return {
-            "name": name,
-            "location": location,
-            "datatype_hint": "id",
-            "sensitivity": "MEDIUM",
-            "is_critical": False,
-        }
+    if _ID_SENS_RE.search(name_lower):
+        return Param(name, location, _HINT_ID, _SENS_MEDIUM, False)
 
     # Default: low sensitivity
-    return {
-        "name": name,
-        "location": location,
-        "datatype_hint": "string",
-        "sensitivity": "LOW",
-        "is_critical": False,
-    }
+    return Param(name, location, _HINT_STRING, _SENS_LOW, False)
+
+
+STATE_CHANGING_METHODS = frozenset({"POST", "PUT", "DELETE", "PATCH"})
 
 
-def detect_behavior(method: str, params: List[Dict]) -> Tuple[str, bool]:
+def detect_behavior(method: str, params: List[Param]) -> Tuple[str, bool]:
     """
     Determine endpoint behavior hint and id_based_access flag.
     """
     method = method.upper() if method else "GET"
 
-    # Check for id-based access
-    id_based = any(p.get("datatype_hint") == "id" for p in params)
+    # Check for id-based access and sensitive params in one pass
+    id_based = False
+    has_sensitive = False
+    for p in params:
+        if p.sensitivity in ("MEDIUM", "HIGH"):
+            has_sensitive = True
+        if p.datatype_hint == "id":
+            id_based = True
+        if id_based and has_sensitive:
+            break
 
     # Determine behavior
-    state_changing_methods = {"POST", "PUT", "DELETE", "PATCH"}
-    has_sensitive = any(p.get("sensitivity") in ("MEDIUM", "HIGH") for p in params)
-
-    if method in state_changing_methods and has_sensitive:
+    if method in STATE_CHANGING_METHODS and has_sensitive:
         return "STATE_CHANGING", id_based
     elif id_based:
         return "ID_BASED_ACCESS", True
@@ -193,57 +337,78 @@ def detect_behavior(method: str, params: List[Dict]) -> Tuple[str, bool]:
         return "OTHER", id_based
 
 
-def compute_prescores(
-    category: str,
-    params: List[Dict],
-    behavior_hint: str,
-    source: str = "UNKNOWN",
-    method: str = "GET",
-) -> Tuple[int, int, int]:
-    """
-    Compute likelihood, impact, and risk scores based on heuristics.
-    Returns: (likelihood_score, impact_score, risk_score)
-    """
-    weights = RISK_POLICY.get("pre_score_weights", {})
-    likelihood_factors = RISK_POLICY.get("likelihood_factors", {})
-    impact_factors = RISK_POLICY.get("impact_factors", {})
-
+def _base_prescores(category: str, behavior_hint: str, wayback: bool) -> Tuple[int, int]:
+    """Unclamped (likelihood, impact) contributed by category, behavior and source."""
     likelihood = 0
     impact = 0
 
     # Category-based scoring
     if category == "ADMIN":
         likelihood += 5
-        impact += weights.get("category_admin", 10)
+        impact += _SCORE_CATEGORY_ADMIN
     elif category == "AUTH":
         likelihood += 4
-        impact += weights.get("category_auth", 10)
+        impact += _SCORE_CATEGORY_AUTH
     elif category == "API":
         likelihood += 3
-        impact += weights.get("category_api", 8)
+        impact += _SCORE_CATEGORY_API
     elif category == "LEGACY":
-        likelihood += weights.get("legacy_extension", 4)
+        likelihood += _SCORE_LEGACY_EXTENSION
         impact += 4
 
-    # Parameter-based scoring
-    for p in params:
-        if p.get("sensitivity") == "HIGH":
-            impact += impact_factors.get("token_param", 4)
-        elif p.get("sensitivity") == "MEDIUM":
-            impact += impact_factors.get("id_param", 3)
-        if p.get("is_critical"):
-            impact += impact_factors.get("has_critical_param", 3)
-
     # Behavior-based scoring
     if behavior_hint == "STATE_CHANGING":
-        likelihood += likelihood_factors.get("state_changing_method", 3)
+        likelihood += _SCORE_STATE_CHANGING
         impact += 3
     elif behavior_hint == "ID_BASED_ACCESS":
         likelihood += 3
 
     # Source-based scoring
-    if source == "WAYBACK":
-        likelihood += likelihood_factors.get("historical_endpoint", 3)
+    if wayback:
+        likelihood += _SCORE_HISTORICAL_ENDPOINT
+
+    return likelihood, impact
+
+
+# Base scores for every (category, behavior_hint, is WAYBACK source) produced by the engine
+_BASE_PRESCORES = {
+    (category, behavior_hint, wayback): _base_prescores(category, behavior_hint, wayback)
+    for category in ("API", "ADMIN", "AUTH", "LEGACY", "HEALTHCHECK", "STATIC", "PUBLIC", "UNKNOWN")
+    for behavior_hint in ("STATE_CHANGING", "ID_BASED_ACCESS", "READ_ONLY", "OTHER")
+    for wayback in (False, True)
+}
+
+
+def compute_prescores(
+    category: str,
+    params: List[Param],
+    behavior_hint: str,
+    source: str = "UNKNOWN",
+    method: str = "GET",
+) -> Tuple[int, int, int]:
+    """
+    Compute likelihood, impact, and risk scores based on heuristics.
+    Returns: (likelihood_score, impact_score, risk_score)
+    """
+    key = (category, behavior_hint, source == "WAYBACK")
+    base = _BASE_PRESCORES.get(key)
+    likelihood, impact = base if base is not None else _base_prescores(*key)
+
+    # Parameter-based scoring (count features, then weight them once)
+    n_high = n_medium = n_critical = 0
+    for p in params:
+        sensitivity = p.sensitivity
+        if sensitivity == "HIGH":
+            n_high += 1
+        elif sensitivity == "MEDIUM":
+            n_medium += 1
+        if p.is_critical:
+            n_critical += 1
+    impact += (
+        n_high * _SCORE_TOKEN_PARAM
+        + n_medium * _SCORE_ID_PARAM
+        + n_critical * _SCORE_CRITICAL_PARAM
+    )
 
     # Clamp scores
     likelihood = max(0, min(10, likelihood))
@@ -256,38 +421,37 @@ def compute_prescores(
     return likelihood, impact, risk
 
 
-def _infer_auth_required(path: str, category: str, params: List[Dict]) -> str:
+def _infer_auth_required(path: str, category: str, params: List[Param], features: int = None) -> str:
     """Infer whether authentication is likely required."""
-    path_lower = path.lower() if path else ""
+    if features is None:
+        features = _path_features(path.lower() if path else "")
 
     # Public patterns
-    public_patterns = ["/.well-known/", "/public/", "/static/", "/assets/", "/favicon", "/robots.txt"]
-    if any(p in path_lower for p in public_patterns):
+    if features & _PUBLIC_BIT:
         return "false"
 
     # Auth-related endpoints
     if category in ("ADMIN", "AUTH"):
-        if "/login" in path_lower or "/signin" in path_lower or "/signup" in path_lower or "/register" in path_lower:
+        if features & _OPEN_AUTH_BIT:
             return "false"
         return "true"
 
     # API endpoints with ID-based access
     if category == "API":
         for p in params:
-            if p.get("datatype_hint") == "id":
+            if p.datatype_hint == "id":
                 return "true"
 
     # Has token/auth param
     for p in params:
-        if p.get("is_critical") or p.get("sensitivity") == "HIGH":
+        if p.is_critical or p.sensitivity == "HIGH":
             return "true"
 
     return "UNKNOWN"
 
 
-def _infer_tech_stack(path: str, extension: str) -> str:
+def _infer_tech_stack(path: str, extension: str, features: int = None) -> str:
     """Infer technology stack from path and extension."""
-    path_lower = path.lower() if path else ""
     ext = extension.lower() if extension else ""
 
     if ext == ".php":
@@ -299,18 +463,19 @@ def _infer_tech_stack(path: str, extension: str) -> str:
     elif ext in (".cgi", ".pl"):
         return "Perl/CGI"
 
-    if "/wp-" in path_lower or "/wordpress" in path_lower:
-        return "WordPress/PHP"
-    elif "/drupal" in path_lower:
-        return "Drupal/PHP"
-    elif "/graphql" in path_lower:
-        return "GraphQL"
-    elif "/api/v" in path_lower:
-        return "REST API"
+    if features is None:
+        features = _path_features(path.lower() if path else "")
+    for stack, bit in _TECH_BITS:
+        if features & bit:
+            return stack
 
     return "Unknown"
 
 
+# Max distinct (query, path, method, source, extension) enrichments kept in memory
+ENRICH_CACHE_SIZE = 50_000
+
+
 def enrich_endpoint(
     endpoint_id: str,
     url: str,
@@ -322,11 +487,21 @@ def enrich_endpoint(
     """
     Full heuristic enrichment for a single endpoint.
     """
+    # Only the query string of the URL feeds the heuristics, so hosts share cache entries
+    return {"endpoint_id": endpoint_id, **_enrich_static(_url_query(url), path, method, source, extension)}
+
+
+@lru_cache(maxsize=ENRICH_CACHE_SIZE)
+def _enrich_static(query: str, path: str, method: str, source: str, extension: Optional[str]) -> Dict:
+    """Endpoint-independent part of enrich_endpoint; cached, so callers must not mutate it."""
+    # Scan the path once for every heuristic pattern
+    features = _path_features(path.lower() if path else "")
+
     # Categorize
-    category = categorize_endpoint(path, method, extension)
+    category = categorize_endpoint(path, method, extension, features)
 
     # Extract params
-    params = extract_parameters(url, path)
+    params = tuple(_extract_parameters(query, path))
 
     # Detect behavior
     behavior_hint, id_based_access = detect_behavior(method, params)
@@ -335,13 +510,12 @@ def enrich_endpoint(
     likelihood, impact, risk = compute_prescores(category, params, behavior_hint, source, method)
 
     # Infer auth_required
-    auth_required = _infer_auth_required(path, category, params)
+    auth_required = _infer_auth_required(path, category, params, features)
 
     # Infer tech_stack_hint
-    tech_stack_hint = _infer_tech_stack(path, extension)
+    tech_stack_hint = _infer_tech_stack(path, extension, features)
 
     return {
-        "endpoint_id": endpoint_id,
         "category": category,
         "likelihood_score": likelihood,
         "impact_score": impact,
@@ -354,6 +528,10 @@ def enrich_endpoint(
     }
 
 
+# Endpoints scoring below this risk get no hypotheses
+HYPOTHESIS_MIN_RISK = 30
+
+
 def generate_hypotheses(endpoint_id: str, enrichment: Dict) -> List[Dict]:
     """
     Generate vulnerability hypotheses based on endpoint enrichment.
@@ -365,7 +543,7 @@ def generate_hypotheses(endpoint_id: str, enrichment: Dict) -> List[Dict]:
     params = enrichment.get("parameters", [])
 
     # Only generate hypotheses for high-risk endpoints
-    if risk_score < 30:
+    if risk_score < HYPOTHESIS_MIN_RISK:
         return hypotheses
 
     # IDOR hypothesis for ID-based access
@@ -391,7 +569,7 @@ def generate_hypotheses(endpoint_id: str, enrichment: Dict) -> List[Dict]:
         })
 
     # SQLi hypothesis for state-changing with params
-    if behavior == "STATE_CHANGING" and any(p.get("sensitivity") in ("MEDIUM", "HIGH") for p in params):
+    if behavior == "STATE_CHANGING" and any(p.sensitivity in ("MEDIUM", "HIGH") for p in params):
         hypotheses.append({
             "type": "SQLI",
             "endpoint_id": endpoint_id,
@@ -418,6 +596,40 @@ def generate_hypotheses(endpoint_id: str, enrichment: Dict) -> List[Dict]:
 # ============================================
 # ENDPOINT INTEL RUNNER
 # ============================================
+def _path_extension(path: str) -> Optional[str]:
+    """Extension of the last path segment (up to any '?'), or None if it has no dot."""
+    dot = path.rfind(".", path.rfind("/") + 1)
+    if dot < 0:
+        return None
+    end = path.find("?", dot)
+    return path[dot:end] if end >= 0 else path[dot:]
+
+
+def enrich_batch(endpoints: List[Dict]) -> List[Dict]:
+    """
+    Enrich a batch of graph ENDPOINT nodes in a single pass.
+
+    Pure CPU work with no I/O, so the whole batch is scored before any
+    result is published to the graph.
+    """
+    enrichments = []
+    for endpoint in endpoints:
+        props = endpoint.get("properties", {})
+
+        path = props.get("path", "")
+        origin = props.get("origin", "")
+        method = props.get("method", "GET")
+        source = props.get("source", "UNKNOWN")
+
+        extension = _path_extension(path)
+
+        url = f"{origin}{path}" if origin and path.startswith("/") else path
+        enrichments.append(
+            enrich_endpoint(endpoint.get("id", ""), url, path, method, source, extension)
+        )
+    return enrichments
+
+
 class EndpointIntelRunner:
     """Orchestrates endpoint intelligence phase"""
 
@@ -434,75 +646,108 @@ class EndpointIntelRunner:
             "high_risk_count": 0,
             "errors": []
         }
+        # Shared graph-service client, open for the duration of run()
+        self._client: Optional[httpx.AsyncClient] = None
+        # Parameter/hypothesis nodes and edges awaiting a bulk publish
+        self._pending_nodes: List[Dict] = []
+        self._pending_edges: List[Dict] = []
+        self._enriched_at = ""
 
     async def get_endpoints(self) -> List[Dict]:
         """Fetch endpoints from graph-service"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.get(
-                    f"{GRAPH_SERVICE}/api/v1/nodes",
-                    params={"mission_id": self.mission_id, "type": "ENDPOINT"}
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("nodes", [])
-            except Exception as e:
-                logger.error("get_endpoints_failed", error=str(e))
+        try:
+            response = await self._client.get(
+                f"{GRAPH_SERVICE}/api/v1/nodes",
+                params={"mission_id": self.mission_id, "type": "ENDPOINT"}
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("nodes", [])
+        except Exception as e:
+            logger.error("get_endpoints_failed", error=str(e))
         return []
 
     async def update_endpoint(self, endpoint_id: str, properties: Dict) -> bool:
         """Update endpoint node in graph-service"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.patch(
-                    f"{GRAPH_SERVICE}/api/v1/nodes/{endpoint_id}",
-                    json={"properties": properties}
-                )
-                return response.status_code in [200, 201]
-            except Exception as e:
-                logger.error("update_endpoint_failed", endpoint_id=endpoint_id, error=str(e))
-                return False
-
-    async def publish_node(self, node_type: str, node_id: str, properties: Dict) -> bool:
-        """Publish a node to graph-service"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{GRAPH_SERVICE}/api/v1/nodes",
-                    json={
-                        "id": node_id,
-                        "type": node_type,
-                        "mission_id": self.mission_id,
-                        "properties": properties
-                    }
-                )
-                return response.status_code in [200, 201]
-            except Exception as e:
-                logger.error("publish_node_failed", node_id=node_id, error=str(e))
-                return False
-
-    async def publish_edge(self, from_node: str, to_node: str, relation: str) -> bool:
-        """Publish an edge to graph-service"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{GRAPH_SERVICE}/api/v1/edges",
-                    json={
-                        "from_node": from_node,
-                        "to_node": to_node,
-                        "relation": relation,
-                        "mission_id": self.mission_id,
-                        "properties": {}
-                    }
-                )
-                return response.status_code in [200, 201]
-            except Exception as e:
-                logger.error("publish_edge_failed", error=str(e))
-                return False
+        try:
+            response = await self._client.patch(
+                f"{GRAPH_SERVICE}/api/v1/nodes/{endpoint_id}",
+                content=orjson.dumps({"properties": properties}),
+                headers=JSON_HEADERS,
+            )
+            return response.status_code in [200, 201]
+        except Exception as e:
+            logger.error("update_endpoint_failed", endpoint_id=endpoint_id, error=str(e))
+            return False
+
+    def queue_node(self, node_type: str, node_id: str, properties: Dict):
+        """Queue a node for the next bulk publish"""
+        self._pending_nodes.append({
+            "id": node_id,
+            "type": node_type,
+            "mission_id": self.mission_id,
+            "properties": properties
+        })
+
+    def queue_edge(self, from_node: str, to_node: str, relation: str):
+        """Queue an edge for the next bulk publish"""
+        self._pending_edges.append({
+            "from_node": from_node,
+            "to_node": to_node,
+            "relation": relation,
+            "mission_id": self.mission_id,
+            "properties": {}
+        })
+
+    async def bulk_publish(self, nodes: List[Dict], edges: List[Dict]) -> bool:
+        """Publish nodes and edges to graph-service in one batch upsert"""
+        try:
+            response = await self._client.post(
+                f"{GRAPH_SERVICE}/api/v1/graph/batchUpsert",
+                content=orjson.dumps({"mission_id": self.mission_id, "nodes": nodes, "edges": edges}),
+                headers=JSON_HEADERS,
+            )
+            if response.status_code in [200, 201]:
+                return True
+            logger.error("bulk_publish_failed", status=response.status_code,
+                         nodes=len(nodes), edges=len(edges))
+            return False
+        except Exception as e:
+            logger.error("bulk_publish_failed", nodes=len(nodes), edges=len(edges), error=str(e))
+            return False
+
+    async def flush_pending(self, force: bool = False) -> bool:
+        """
+        Bulk publish queued nodes/edges once BULK_PUBLISH_SIZE is reached (or always if force),
+        recording a failed publish in the run's errors
+        """
+        if not force and len(self._pending_nodes) + len(self._pending_edges) < BULK_PUBLISH_SIZE:
+            return True
+        if not self._pending_nodes and not self._pending_edges:
+            return True
+        # Swap the buffers before awaiting so concurrent endpoints keep queueing into fresh lists
+        nodes, self._pending_nodes = self._pending_nodes, []
+        edges, self._pending_edges = self._pending_edges, []
+        if await self.bulk_publish(nodes, edges):
+            return True
+        self.results["errors"].append(f"graph publish failed: {len(nodes)} nodes, {len(edges)} edges")
+        return False
 
     async def run(self) -> Dict:
         """Execute endpoint intelligence phase"""
+        # One pooled client for every graph-service call in this run
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            self._client = client
+            try:
+                return await self._run()
+            finally:
+                self._client = None
+
+    async def _run(self) -> Dict:
         start_time = datetime.utcnow()
+        # One enrichment timestamp for the whole run
+        self._enriched_at = start_time.isoformat()
 
         # 1. Get all endpoints
         endpoints = await self.get_endpoints()
@@ -513,95 +758,106 @@ class EndpointIntelRunner:
             logger.warning("no_endpoints_found")
             return self._build_result(start_time)
 
-        # 2. Enrich each endpoint
-        for endpoint in endpoints:
-            endpoint_id = endpoint.get("id", "")
-            props = endpoint.get("properties", {})
-
-            path = props.get("path", "")
-            origin = props.get("origin", "")
-            method = props.get("method", "GET")
-            source = props.get("source", "UNKNOWN")
-
-            # Get extension from path
-            extension = None
-            if "." in path.split("/")[-1]:
-                extension = "." + path.split(".")[-1].split("?")[0]
-
-            # Enrich endpoint
-            url = f"{origin}{path}" if origin and path.startswith("/") else path
-            enrichment = enrich_endpoint(endpoint_id, url, path, method, source, extension)
-
-            # Update category distribution
-            category = enrichment["category"]
-            self.results["category_distribution"][category] = self.results["category_distribution"].get(category, 0) + 1
-
-            # Track high-risk endpoints
-            if enrichment["risk_score"] >= 50:
-                self.results["high_risk_count"] += 1
-
-            # Track parameters
-            self.results["parameters_found"] += len(enrichment["parameters"])
-
-            # Update endpoint in graph
-            update_props = {
-                "category": enrichment["category"],
-                "likelihood_score": enrichment["likelihood_score"],
-                "impact_score": enrichment["impact_score"],
-                "risk_score": enrichment["risk_score"],
-                "behavior_hint": enrichment["behavior_hint"],
-                "id_based_access": enrichment["id_based_access"],
-                "auth_required": enrichment["auth_required"],
-                "tech_stack_hint": enrichment["tech_stack_hint"],
-                "enriched_at": datetime.utcnow().isoformat()
-            }
+        # 2. Score endpoints in batches on the process pool, off the event loop
+        loop = asyncio.get_running_loop()
+        executor = get_enrich_executor()
+        batches = [
+            endpoints[i:i + ENRICH_BATCH_SIZE]
+            for i in range(0, len(endpoints), ENRICH_BATCH_SIZE)
+        ]
+        scoring = [loop.run_in_executor(executor, enrich_batch, batch) for batch in batches]
 
-            await self.update_endpoint(endpoint_id, update_props)
-            self.results["endpoints_enriched"] += 1
-
-            # Publish parameters as nodes
-            for param in enrichment["parameters"]:
-                param_id = f"param:{endpoint_id}:{param['name']}"
-                await self.publish_node(
-                    "PARAMETER",
-                    param_id,
-                    {
-                        "name": param["name"],
-                        "location": param["location"],
-                        "datatype_hint": param["datatype_hint"],
-                        "sensitivity": param["sensitivity"],
-                        "is_critical": param["is_critical"],
-                        "endpoint_id": endpoint_id
-                    }
-                )
-                await self.publish_edge(endpoint_id, param_id, "HAS_PARAMETER")
-
-            # Generate and publish hypotheses
-            hypotheses = generate_hypotheses(endpoint_id, enrichment)
-            for hyp in hypotheses:
-                hyp_id = f"hypothesis:{endpoint_id}:{hyp['type']}"
-                await self.publish_node(
-                    "HYPOTHESIS",
-                    hyp_id,
-                    {
-                        "type": hyp["type"],
-                        "priority": hyp["priority"],
-                        "confidence": hyp["confidence"],
-                        "description": hyp["description"],
-                        "status": hyp["status"],
-                        "endpoint_id": endpoint_id
-                    }
-                )
-                await self.publish_edge(endpoint_id, hyp_id, "HAS_HYPOTHESIS")
-                self.results["hypotheses_generated"] += 1
-
-            logger.debug("endpoint_enriched",
-                        endpoint_id=endpoint_id,
-                        category=category,
-                        risk_score=enrichment["risk_score"])
+        # 3. Publish each batch as soon as it is scored (bounded concurrency)
+        semaphore = asyncio.Semaphore(ENDPOINT_CONCURRENCY)
+
+        async def _publish_one(endpoint: Dict, enrichment: Dict):
+            async with semaphore:
+                await self._process_endpoint(endpoint.get("id", ""), enrichment)
+
+        async def _publish_batch(batch: List[Dict], scored: asyncio.Future):
+            enrichments = await scored
+            await asyncio.gather(*(
+                _publish_one(endpoint, enrichment)
+                for endpoint, enrichment in zip(batch, enrichments)
+            ))
+
+        await asyncio.gather(*(
+            _publish_batch(batch, scored) for batch, scored in zip(batches, scoring)
+        ))
+
+        # 4. Publish whatever is still queued
+        await self.flush_pending(force=True)
 
         return self._build_result(start_time)
 
+    async def _process_endpoint(self, endpoint_id: str, enrichment: Dict):
+        """Publish one scored endpoint: its update, parameters and hypotheses"""
+        # Update category distribution
+        category = enrichment["category"]
+        self.results["category_distribution"][category] = self.results["category_distribution"].get(category, 0) + 1
+
+        # Track high-risk endpoints
+        if enrichment["risk_score"] >= 50:
+            self.results["high_risk_count"] += 1
+
+        # Track parameters
+        self.results["parameters_found"] += len(enrichment["parameters"])
+
+        # Update endpoint in graph
+        update_props = {
+            "category": enrichment["category"],
+            "likelihood_score": enrichment["likelihood_score"],
+            "impact_score": enrichment["impact_score"],
+            "risk_score": enrichment["risk_score"],
+            "behavior_hint": enrichment["behavior_hint"],
+            "id_based_access": enrichment["id_based_access"],
+            "auth_required": enrichment["auth_required"],
+            "tech_stack_hint": enrichment["tech_stack_hint"],
+            "enriched_at": self._enriched_at
+        }
+
+        await self.update_endpoint(endpoint_id, update_props)
+
+        # Queue parameters as nodes (published in bulk)
+        for param in enrichment["parameters"]:
+            param_id = f"param:{endpoint_id}:{param.name}"
+            self.queue_node(
+                "PARAMETER",
+                param_id,
+                {**param._asdict(), "endpoint_id": endpoint_id}
+            )
+            self.queue_edge(endpoint_id, param_id, "HAS_PARAMETER")
+
+        # Generate and queue hypotheses (most endpoints are below the risk threshold)
+        if enrichment["risk_score"] >= HYPOTHESIS_MIN_RISK:
+            hypotheses = generate_hypotheses(endpoint_id, enrichment)
+        else:
+            hypotheses = ()
+        for hyp in hypotheses:
+            hyp_id = f"hypothesis:{endpoint_id}:{hyp['type']}"
+            self.queue_node(
+                "HYPOTHESIS",
+                hyp_id,
+                {
+                    "type": hyp["type"],
+                    "priority": hyp["priority"],
+                    "confidence": hyp["confidence"],
+                    "description": hyp["description"],
+                    "status": hyp["status"],
+                    "endpoint_id": endpoint_id
+                }
+            )
+            self.queue_edge(endpoint_id, hyp_id, "HAS_HYPOTHESIS")
+        self.results["hypotheses_generated"] += len(hypotheses)
+
+        self.results["endpoints_enriched"] += 1
+        await self.flush_pending()
+
+        logger.debug("endpoint_enriched",
+                    endpoint_id=endpoint_id,
+                    category=category,
+                    risk_score=enrichment["risk_score"])
+
     def _build_result(self, start_time: datetime) -> Dict:
         duration = (datetime.utcnow() - start_time).total_seconds()
         return {
@@ -670,13 +926,12 @@ async def enrich_single(endpoint: Dict[str, Any]):
     method = endpoint.get("method", "GET")
     source = endpoint.get("source", "UNKNOWN")
 
-    extension = None
-    if "." in path.split("/")[-1]:
-        extension = "." + path.split(".")[-1].split("?")[0]
+    extension = _path_extension(path)
 
     url = f"{origin}{path}" if origin and path.startswith("/") else path
     enrichment = enrich_endpoint(endpoint_id, url, path, method, source, extension)
     hypotheses = generate_hypotheses(endpoint_id, enrichment)
+    enrichment["parameters"] = [param._asdict() for param in enrichment["parameters"]]
 
     return {
         "enrichment": enrichment,
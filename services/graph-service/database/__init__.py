@@ -1,6 +1,7 @@
 from .db import (
     init_db,
     get_db,
+    close_db,
     create_mission,
     get_mission,
     update_mission,
@@ -24,6 +25,7 @@ from .db import (
 __all__ = [
     "init_db",
     "get_db",
+    "close_db",
     "create_mission",
     "get_mission",
     "update_mission",
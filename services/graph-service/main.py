@@ -6,8 +6,9 @@ Persists data to SQLite database
 """
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any, Set
+from typing import Optional, List, Dict, Any, Set, Tuple
 from enum import Enum
 from datetime import datetime
 import structlog
@@ -15,12 +16,22 @@ import os
 import sys
 import json
 import asyncio
+import sqlite3
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 
 # Import local database module
 from database import db as database
 from database.db import generate_edge_id
 
+# orjson for event and response encoding (optional - falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 # Kafka producer (aiokafka)
 try:
     from aiokafka import AIOKafkaProducer
@@ -48,37 +59,59 @@ logger = structlog.get_logger()
 KAFKA_BROKERS = os.getenv("KAFKA_BROKERS", "kafka:9092")
 KAFKA_TOPIC_EVENTS = "graph.events"
 KAFKA_TOPIC_LOGS = "logs.recon"
+# Producer batching: events are enqueued with send() and coalesced into broker requests
+KAFKA_LINGER_MS = 20
+KAFKA_MAX_BATCH_SIZE = 1_048_576
 
 # Event Envelope v2 constants
 SCHEMA_VERSION = "v2"
 PRODUCER_NAME = "graph-service"
 
-import uuid
 import time
 
+# IDs come straight from os.urandom: no uuid.UUID object built per event
 def generate_event_id() -> str:
-    """Generate unique event ID"""
-    return str(uuid.uuid4())
+    """Generate unique event ID (random UUID4 string)"""
+    raw = bytearray(os.urandom(16))
+    raw[6] = raw[6] & 0x0F | 0x40  # version 4
+    raw[8] = raw[8] & 0x3F | 0x80  # RFC 4122 variant
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 def generate_trace_id() -> str:
     """Generate trace ID"""
-    return f"trc_{uuid.uuid4().hex[:16]}"
+    return f"trc_{os.urandom(8).hex()}"
 
 def generate_span_id() -> str:
     """Generate span ID"""
-    return f"spn_{uuid.uuid4().hex[:12]}"
+    return f"spn_{os.urandom(6).hex()}"
+
+# "ts" has whole-second resolution: format it once per second
+_ts_iso_cache = (None, "")
 
-def build_event_envelope_v2(event_type: str, mission_id: str, payload: dict, phase: str = "") -> dict:
+def format_ts_iso(ts_epoch: float) -> str:
+    """Envelope "ts" string for an epoch timestamp"""
+    global _ts_iso_cache
+    second = int(ts_epoch)
+    if _ts_iso_cache[0] != second:
+        _ts_iso_cache = (second, time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(second)))
+    return _ts_iso_cache[1]
+
+def build_event_envelope_v2(event_type: str, mission_id: str, payload: dict, phase: str = "",
+                            ts_epoch: Optional[float] = None, ts_iso: Optional[str] = None) -> dict:
     """
     Build Event Envelope v2 for Kafka publishing.
     P0.1: All events must use standardized envelope.
+    Batch callers pass ts_epoch/ts_iso so every event of the batch shares one timestamp.
     """
+    if ts_epoch is None:
+        ts_epoch = time.time()
     return {
         "schema_version": SCHEMA_VERSION,
         "event_id": generate_event_id(),
         "event_type": event_type,
-        "ts": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
-        "timestamp": time.time(),
+        "ts": ts_iso or format_ts_iso(ts_epoch),
+        "timestamp": ts_epoch,
         "mission_id": mission_id,
         "run_id": mission_id,
         "phase": phase,
@@ -90,26 +123,247 @@ def build_event_envelope_v2(event_type: str, mission_id: str, payload: dict, pha
         "payload": payload,
     }
 
+# Retries for writes that still hit "database is locked" after the busy timeout
+DB_WRITE_RETRIES = 5
+DB_RETRY_INITIAL_DELAY = 0.2  # seconds, doubled after each attempt
+
+async def _execute_with_retry(func, *args):
+    """Run a database write, backing off and retrying on transient lock errors"""
+    delay = DB_RETRY_INITIAL_DELAY
+    for attempt in range(1, DB_WRITE_RETRIES + 1):
+        try:
+            return await func(*args)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or attempt == DB_WRITE_RETRIES:
+                raise
+            logger.warning("db_locked_retry", operation=func.__name__, attempt=attempt, delay=delay)
+            await asyncio.sleep(delay)
+            delay *= 2
+
+# Single-item writes: create_node/create_edge update memory right away and queue the row;
+# a background writer persists everything pending with one database.batch_upsert.
+WRITE_FLUSH_INTERVAL = 0.01  # seconds to wait for more writes before flushing
+WRITE_FLUSH_MAX_ITEMS = 500
+WRITE_QUEUE_SIZE = 50000  # put() waits when full (backpressure)
+WRITE_RETRY_INTERVAL = 1.0  # seconds between retries of writes that failed
+WRITE_RETRY_MAX_ITEMS = 10000  # oldest kept writes are dropped (and logged) beyond this
+_write_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+# Memory and events already report these items as created, so a write that fails on a
+# transient lock is kept and retried with the next batch; a write that can never succeed
+# is logged and counted as dead-lettered instead. /health reports both.
+_unpersisted_writes: List[Tuple[str, Dict]] = []
+_write_failures = 0
+_dead_lettered_writes = 0
+_writer_lock = asyncio.Lock()  # held while a batch is being persisted
+
+def _start_writer():
+    """Start the background writer task (again, if it is not running)"""
+    global _write_queue, _writer_task
+    if _writer_task is None or _writer_task.done():
+        _write_queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+        _writer_task = asyncio.create_task(_writer_loop(_write_queue))
+
+async def _writer_loop(queue: asyncio.Queue):
+    """Background task: persist queued nodes and edges in batches"""
+    while True:
+        if _unpersisted_writes:
+            # Wake up for new writes, or retry the failed ones on their own
+            try:
+                items = [await asyncio.wait_for(queue.get(), timeout=WRITE_RETRY_INTERVAL)]
+            except asyncio.TimeoutError:
+                items = []
+        else:
+            items = [await queue.get()]
+        await asyncio.sleep(WRITE_FLUSH_INTERVAL)
+        while len(items) < WRITE_FLUSH_MAX_ITEMS and not queue.empty():
+            items.append(queue.get_nowait())
+        try:
+            async with _writer_lock:
+                await _persist_writes(items)
+        finally:
+            for _ in items:
+                queue.task_done()
+
+def _is_transient_write_error(error: Exception) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+async def _upsert_writes(writes: List[Tuple[str, Dict]]):
+    nodes = [data for kind, data in writes if kind == "node"]
+    edges = [data for kind, data in writes if kind == "edge"]
+    await _execute_with_retry(database.batch_upsert, nodes, edges)
+
+async def _persist_writes(items: List[Tuple[str, Dict]]):
+    """
+    Persist earlier failed writes plus items in one batch upsert. If the batch fails on
+    anything but a lock, it is replayed row by row so one bad row cannot hold back the rest:
+    rows failing on a lock are kept for retry, rows that can never succeed are dropped.
+    """
+    global _write_failures, _dead_lettered_writes
+    pending = _unpersisted_writes + items
+    if not pending:
+        return
+    try:
+        await _upsert_writes(pending)
+        _unpersisted_writes.clear()
+        return
+    except Exception as e:
+        _write_failures += 1
+        logger.error("queued_write_failed", items=len(pending), error=str(e))
+        if _is_transient_write_error(e):
+            retry = pending
+        else:
+            retry = []
+            for kind, data in pending:
+                try:
+                    await _upsert_writes([(kind, data)])
+                except Exception as row_error:
+                    if _is_transient_write_error(row_error):
+                        retry.append((kind, data))
+                    else:
+                        _dead_lettered_writes += 1
+                        logger.error("queued_write_dead_lettered", kind=kind, id=data.get("id"),
+                                     mission_id=data.get("mission_id"), error=str(row_error))
+
+    if len(retry) > WRITE_RETRY_MAX_ITEMS:
+        logger.error("queued_writes_dropped", items=len(retry) - WRITE_RETRY_MAX_ITEMS)
+        retry = retry[-WRITE_RETRY_MAX_ITEMS:]
+    _unpersisted_writes[:] = retry
+
+async def queue_write(kind: str, data: Dict):
+    """Queue a node ("node") or edge ("edge") for the background writer"""
+    _start_writer()
+    await _write_queue.put((kind, data))
+
+async def flush_writes():
+    """Wait until every queued node/edge has been written (or kept for retry)"""
+    if _writer_task is not None and not _writer_task.done():
+        await _write_queue.join()
+
+async def discard_unpersisted_writes(mission_id: Optional[str] = None):
+    """Drop failed writes of a mission (or all) being deleted, so a retry cannot bring them back"""
+    async with _writer_lock:
+        _unpersisted_writes[:] = [
+            (kind, data) for kind, data in _unpersisted_writes
+            if mission_id is not None and data["mission_id"] != mission_id
+        ]
+
+async def stop_writer():
+    """Persist pending writes, then stop the background writer"""
+    global _writer_task
+    if _writer_task is not None:
+        await flush_writes()
+        _writer_task.cancel()
+        try:
+            await _writer_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _writer_task = None
+    if _unpersisted_writes:
+        # Last attempt for writes that kept failing
+        await _persist_writes([])
+        if _unpersisted_writes:
+            logger.error("queued_writes_unpersisted", items=len(_unpersisted_writes))
+
 # Global producer
 kafka_producer: Optional[AIOKafkaProducer] = None
 
-# WebSocket connections for real-time updates
-ws_connections: Dict[str, Set[WebSocket]] = {}  # mission_id -> connections
+# Messages buffered per WebSocket client before it is dropped as too slow
+WS_SEND_QUEUE_SIZE = 32
+# A single frame only fails after a generous, size-scaled timeout (batch envelopes can be
+# megabytes); slow consumers are caught by the bounded queue overflowing instead
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))  # seconds, plus the size allowance
+WS_SEND_MIN_RATE = 64 * 1024  # bytes/s assumed for the slowest healthy link
 
-async def close_all_websockets():
-    """Close all WebSocket connections gracefully"""
-    for mission_id, connections in ws_connections.items():
-        for ws in list(connections):
+def ws_send_timeout(message: str) -> float:
+    return WS_SEND_TIMEOUT + len(message) / WS_SEND_MIN_RATE
+
+@dataclass(eq=False)
+class WebSocketChannel:
+    """A WebSocket client with its own send queue, drained by a relay task"""
+    ws: WebSocket
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE))
+    relay_task: Optional[asyncio.Task] = None
+    closed: bool = False
+
+    def start(self):
+        self.relay_task = asyncio.create_task(self._relay())
+
+    async def _relay(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.ws.send_text(message), timeout=ws_send_timeout(message))
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.closed = True
+            logger.warning("ws_send_timeout", size=len(message), timeout=ws_send_timeout(message))
             try:
-                await ws.close(code=1001, reason="Server shutdown")
+                await self.ws.close(code=1013, reason="Send timed out")
             except Exception:
                 pass
+        except Exception:
+            # Client already gone
+            self.closed = True
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without waiting; False if the client is gone or too far behind"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.closed = True
+            return False
+
+    def stop(self):
+        """Stop relaying and drop anything still queued"""
+        self.closed = True
+        if self.relay_task is not None:
+            self.relay_task.cancel()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def close(self, code: int, reason: str):
+        self.stop()
+        try:
+            await self.ws.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+# WebSocket connections for real-time updates. Closed channels are skipped by publishers
+# and compacted out periodically, so broadcasts never remove from the list in place.
+WS_SWEEP_INTERVAL = 30  # seconds
+ws_connections: Dict[str, List[WebSocketChannel]] = {}  # mission_id -> channels
+_ws_sweeper_task: Optional[asyncio.Task] = None
+
+def sweep_ws_connections():
+    """Drop closed channels (and missions left without any)"""
+    for mission_id, channels in list(ws_connections.items()):
+        channels[:] = [channel for channel in channels if not channel.closed]
+        if not channels:
+            del ws_connections[mission_id]
+
+async def _ws_sweeper():
+    while True:
+        await asyncio.sleep(WS_SWEEP_INTERVAL)
+        sweep_ws_connections()
+
+async def close_all_websockets():
+    """Close all WebSocket connections gracefully"""
+    channels = [channel for mission_channels in ws_connections.values() for channel in mission_channels]
+    await asyncio.gather(
+        *(channel.close(code=1001, reason="Server shutdown") for channel in channels),
+        return_exceptions=True
+    )
     ws_connections.clear()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown lifecycle"""
-    global kafka_producer
+    global kafka_producer, _ws_sweeper_task, _layout_flusher_task
 
     # Initialize database
     await database.init_db()
@@ -123,7 +377,12 @@ async def lifespan(app: FastAPI):
         try:
             kafka_producer = AIOKafkaProducer(
                 bootstrap_servers=KAFKA_BROKERS,
-                value_serializer=lambda v: json.dumps(v, default=str).encode('utf-8')
+                # publish_event hands over envelopes already encoded (see encode_message)
+                value_serializer=lambda v: v if isinstance(v, bytes) else encode_message(v).encode('utf-8'),
+                acks=1,
+                linger_ms=KAFKA_LINGER_MS,
+                max_batch_size=KAFKA_MAX_BATCH_SIZE,
+                compression_type="lz4"
             )
             await kafka_producer.start()
             logger.info("kafka_connected", brokers=KAFKA_BROKERS)
@@ -131,33 +390,71 @@ async def lifespan(app: FastAPI):
             logger.warning("kafka_connection_failed", error=str(e))
             kafka_producer = None
 
+    _ws_sweeper_task = asyncio.create_task(_ws_sweeper())
+    _layout_flusher_task = asyncio.create_task(_layout_flusher())
+
     yield
 
     # Shutdown: Close WebSocket connections and Kafka producer
     logger.info("shutdown_started")
+    _ws_sweeper_task.cancel()
     await close_all_websockets()
 
     if kafka_producer:
+        # Deliver events still lingering in the producer's batches
+        await kafka_producer.flush()
         await kafka_producer.stop()
+    await stop_writer()
+    _layout_flusher_task.cancel()
+    try:
+        await _layout_flusher_task
+    except asyncio.CancelledError:
+        pass
+    await flush_layouts()
+    if _pending_layouts:
+        logger.error("layouts_unsaved", missions=list(_pending_layouts))
+    await database.close_db()
     logger.info("shutdown_complete")
 
+# Missions loaded concurrently at startup
+DB_LOAD_CONCURRENCY = 8
+
 async def load_from_database():
     """Load existing nodes and edges from database into memory"""
-    # Load all missions and their nodes/edges
+    # Load all missions and their nodes/edges, several missions at a time
     missions, _ = await database.list_missions(limit=1000)
-    for mission in missions:
-        nodes, _ = await database.query_nodes(mission["id"], limit=10000)
+    semaphore = asyncio.Semaphore(DB_LOAD_CONCURRENCY)
+
+    async def load_mission(mission_id: str):
+        async with semaphore:
+            nodes, _ = await database.query_nodes(mission_id, limit=10000)
+            edges = await database.get_edges(mission_id)
+        return nodes, edges
+
+    results = await asyncio.gather(*(load_mission(mission["id"]) for mission in missions))
+
+    # Index everything in one pass, in mission order
+    for nodes, edges in results:
         for node in nodes:
-            nodes_store[node["id"]] = node
-        edges = await database.get_edges(mission["id"])
-        edges_store.extend(edges)
+            store_node(node)
+        for edge in edges:
+            store_edge(edge)
     logger.info("data_loaded_from_db", nodes=len(nodes_store), edges=len(edges_store))
 
+class _ORJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        try:
+            return super().render(content)
+        except TypeError:
+            # orjson rejects ints beyond 64 bits, which the stdlib encoder writes as is
+            return JSONResponse.render(self, content)
+
 app = FastAPI(
     title="Graph Service",
     description="CQRS service for Asset Graph management with real-time events",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=_ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
 app.add_middleware(
@@ -307,10 +604,82 @@ class GraphEvent(BaseModel):
 
 # In-memory store (replace with PostgreSQL in production)
 nodes_store: Dict[str, Dict] = {}
-edges_store: List[Dict] = []
+nodes_by_mission: Dict[str, Dict[str, Dict]] = {}  # mission_id -> node_id -> node
+# mission_id -> type -> node_id -> node; bucket sizes double as per-type node counts
+nodes_by_mission_type: Dict[str, Dict[str, Dict[str, Dict]]] = {}
+edges_store: Dict[str, Dict] = {}  # edge_id -> edge
+edges_by_mission: Dict[str, Dict[str, Dict]] = {}  # mission_id -> edge_id -> edge
+
+def store_node(node_data: Dict):
+    """Add or replace a node in the in-memory store and its mission/type indexes"""
+    node_id = node_data["id"]
+    mission_id = node_data["mission_id"]
+    previous = nodes_store.get(node_id)
+    if previous is not None and (previous["mission_id"] != mission_id or previous["type"] != node_data["type"]):
+        _unindex_node(previous)
+    nodes_store[node_id] = node_data
+    nodes_by_mission.setdefault(mission_id, {})[node_id] = node_data
+    nodes_by_mission_type.setdefault(mission_id, {}).setdefault(node_data["type"], {})[node_id] = node_data
+
+def drop_node(node_id: str) -> Optional[Dict]:
+    """Remove a node from the in-memory store and its indexes"""
+    node = nodes_store.pop(node_id, None)
+    if node is not None:
+        _unindex_node(node)
+        _evidence_index.pop(node_id, None)
+    return node
+
+def _unindex_node(node: Dict):
+    mission_id = node["mission_id"]
+    mission_types = nodes_by_mission_type.get(mission_id, {})
+    for index, key in ((nodes_by_mission, mission_id), (mission_types, node["type"])):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(node["id"], None)
+            if not bucket:
+                del index[key]
+    if not mission_types:
+        nodes_by_mission_type.pop(mission_id, None)
+
+def store_edge(edge_data: Dict) -> bool:
+    """
+    Add an edge to the in-memory store unless its ID is already there (idempotent).
+    IDs are deterministic, so a repeat is the same edge: the first copy is kept, matching
+    the INSERT OR IGNORE the database does.
+    """
+    edge_id = edge_data["id"]
+    if edges_store.setdefault(edge_id, edge_data) is not edge_data:
+        return False
+    edges_by_mission.setdefault(edge_data["mission_id"], {})[edge_id] = edge_data
+    return True
 
 # Event publishing
-async def publish_event(event: GraphEvent):
+# Outgoing messages are encoded once and the same text is sent to Kafka and every
+# WebSocket client. Frames stay text (not bytes): the UI JSON.parses event.data.
+if ORJSON_AVAILABLE:
+    def encode_message(message: dict) -> str:
+        """Encode an outgoing message (event envelope, snapshot) to JSON text"""
+        try:
+            return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # orjson rejects ints beyond 64 bits, which the stdlib encoder writes as is
+            return json.dumps(serialize_for_json(message), default=str)
+
+    # orjson writes datetimes (isoformat) and enums (.value) natively
+    _encode_stored = encode_message
+else:
+    def encode_message(message: dict) -> str:
+        """Encode an outgoing message (event envelope, snapshot) to JSON text"""
+        return json.dumps(message, default=str)
+
+    def _encode_stored(item: Dict) -> str:
+        return json.dumps(serialize_for_json(item), default=str)
+
+def _log_kafka_delivery_failure(delivery: asyncio.Future):
+    if not delivery.cancelled() and delivery.exception() is not None:
+        logger.warning("kafka_publish_failed", error=str(delivery.exception()))
+
+async def publish_event(event: GraphEvent, ts_epoch: Optional[float] = None, ts_iso: Optional[str] = None):
     """Publish event to Kafka and WebSocket clients using Event Envelope v2"""
     # Build Event Envelope v2 (P0.1)
     event_envelope = build_event_envelope_v2(
@@ -318,33 +687,39 @@ async def publish_event(event: GraphEvent):
         mission_id=event.run_id,
         payload={
             "source": event.source,
-            **serialize_for_json(event.payload),
+            # orjson encodes datetimes and enums itself; only the stdlib path needs the walk
+            **(event.payload if ORJSON_AVAILABLE else serialize_for_json(event.payload)),
         },
+        ts_epoch=ts_epoch,
+        ts_iso=ts_iso,
     )
 
+    # One encoding per event: batch envelopes carry thousands of nodes/edges
+    encoded_envelope = encode_message(event_envelope)
+
     # Publish to Kafka
     if kafka_producer:
         try:
-            await kafka_producer.send_and_wait(
+            # Enqueue only: the producer batches sends and delivers them in the background
+            delivery = await kafka_producer.send(
                 KAFKA_TOPIC_EVENTS,
-                value=event_envelope,
+                value=encoded_envelope.encode('utf-8'),
                 key=event.run_id.encode('utf-8')
             )
+            delivery.add_done_callback(_log_kafka_delivery_failure)
         except Exception as e:
             logger.warning("kafka_publish_failed", error=str(e))
 
-    # Broadcast to WebSocket clients (use envelope for consistency)
+    # Broadcast to WebSocket clients (use envelope for consistency). Each client's relay
+    # task does the actual send, so a slow client never holds up the publisher.
     mission_id = event.run_id
-    if mission_id in ws_connections:
-        dead_connections = set()
-        for ws in ws_connections[mission_id]:
-            try:
-                await ws.send_json(event_envelope)
-            except Exception:
-                dead_connections.add(ws)
-
-        # Clean up dead connections
-        ws_connections[mission_id] -= dead_connections
+    for channel in ws_connections.get(mission_id, ()):
+        if channel.closed:
+            continue
+        if not channel.offer(encoded_envelope):
+            # Fell too far behind: drop it (the sweeper removes it from the list)
+            logger.warning("ws_client_too_slow", mission_id=mission_id, queued=WS_SEND_QUEUE_SIZE)
+            asyncio.create_task(channel.close(code=1013, reason="Client too slow"))
 
 # WebSocket endpoint for real-time graph events
 @app.websocket("/ws/graph/{mission_id}")
@@ -352,32 +727,36 @@ async def websocket_graph_events(websocket: WebSocket, mission_id: str):
     """WebSocket endpoint for real-time graph updates"""
     await websocket.accept()
 
-    # Register connection
-    if mission_id not in ws_connections:
-        ws_connections[mission_id] = set()
-    ws_connections[mission_id].add(websocket)
+    # Register connection (events published from here on queue up behind the snapshot)
+    channel = WebSocketChannel(websocket)
+    ws_connections.setdefault(mission_id, []).append(channel)
 
     logger.info("ws_connected", mission_id=mission_id)
 
     try:
-        # Send initial snapshot
-        snapshot = await get_mission_snapshot(mission_id)
-        await websocket.send_json({"type": "snapshot", "data": snapshot})
+        # Send initial snapshot, then hand all further sends to the relay task
+        await websocket.send_text(await encode_snapshot_message(mission_id))
+        channel.start()
 
         # Keep connection alive and handle incoming messages
         while True:
             data = await websocket.receive_text()
             # Handle ping/pong or client commands
             if data == "ping":
-                await websocket.send_text("pong")
+                channel.offer("pong")
     except WebSocketDisconnect:
         logger.info("ws_disconnected", mission_id=mission_id)
     finally:
-        if mission_id in ws_connections:
-            ws_connections[mission_id].discard(websocket)
+        # Marked closed here; the sweeper removes it from ws_connections
+        channel.stop()
+
+# Exact types returned as-is (str-based enums still go through .value below)
+_JSON_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
 
 def serialize_for_json(obj):
     """Recursively serialize objects for JSON"""
+    if type(obj) in _JSON_SCALAR_TYPES:
+        return obj
     if isinstance(obj, datetime):
         return obj.isoformat()
     elif isinstance(obj, dict):
@@ -388,10 +767,41 @@ def serialize_for_json(obj):
         return obj.value
     return obj
 
+# Snapshots with more nodes + edges than this are encoded on a worker thread
+SNAPSHOT_OFFLOAD_THRESHOLD = 2000
+
+async def encode_snapshot_message(mission_id: str) -> str:
+    """
+    Encode the WebSocket snapshot message for a mission straight from the mission
+    indexes, one node/edge at a time, without building serialized copies of them first.
+    """
+    # Shallow copies taken on the loop, so the worker never iterates a dict being resized
+    nodes = list(nodes_by_mission.get(mission_id, {}).values())
+    edges = list(edges_by_mission.get(mission_id, {}).values())
+    # Offload only with orjson: each item is then encoded in one call holding the GIL,
+    # whereas the stdlib path walks live property dicts in Python
+    if ORJSON_AVAILABLE and len(nodes) + len(edges) > SNAPSHOT_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(_encode_snapshot, mission_id, nodes, edges)
+    return _encode_snapshot(mission_id, nodes, edges)
+
+def _encode_stored_list(items: List[Dict]) -> str:
+    """Encode stored nodes/edges as a JSON array, without serialized copies of them"""
+    return "[" + ",".join(_encode_stored(item) for item in items) + "]"
+
+def _encode_snapshot(mission_id: str, nodes: List[Dict], edges: List[Dict]) -> str:
+    return (
+        '{"type":"snapshot","data":{'
+        f'"mission_id":{encode_message(mission_id)},'
+        f'"nodes":{_encode_stored_list(nodes)},'
+        f'"edges":{_encode_stored_list(edges)},'
+        f'"timestamp":{encode_message(datetime.utcnow().isoformat())}'
+        '}}'
+    )
+
 async def get_mission_snapshot(mission_id: str) -> Dict:
     """Get current graph state for a mission"""
-    mission_nodes = [serialize_for_json(n) for n in nodes_store.values() if n["mission_id"] == mission_id]
-    mission_edges = [serialize_for_json(e) for e in edges_store if e["mission_id"] == mission_id]
+    mission_nodes = [serialize_for_json(n) for n in nodes_by_mission.get(mission_id, {}).values()]
+    mission_edges = [serialize_for_json(e) for e in edges_by_mission.get(mission_id, {}).values()]
     return {
         "mission_id": mission_id,
         "nodes": mission_nodes,
@@ -403,10 +813,15 @@ async def get_mission_snapshot(mission_id: str) -> Dict:
 async def health():
     kafka_status = "connected" if kafka_producer else "unavailable"
     return {
-        "status": "healthy",
+        "status": "degraded" if _unpersisted_writes else "healthy",
         "service": "graph-service",
         "kafka": kafka_status,
-        "ws_connections": sum(len(conns) for conns in ws_connections.values()),
+        "db_writes": {
+            "unpersisted": len(_unpersisted_writes),
+            "failed_batches": _write_failures,
+            "dead_lettered": _dead_lettered_writes
+        },
+        "ws_connections": sum(not channel.closed for channels in ws_connections.values() for channel in channels),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -426,10 +841,10 @@ async def create_node(node: NodeCreate, source: str = "api"):
         "created_at": nodes_store.get(node.id, {}).get("created_at", now.isoformat()),
         "updated_at": now.isoformat()
     }
-    nodes_store[node.id] = node_data
+    store_node(node_data)
 
-    # Persist to database
-    await database.create_node(node_data)
+    # Persist to database (queued; written by the background writer)
+    await queue_write("node", node_data)
 
     # Publish event
     event = GraphEvent(
@@ -440,7 +855,8 @@ async def create_node(node: NodeCreate, source: str = "api"):
     )
     await publish_event(event)
 
-    return NodeResponse(**node_data)
+    # response_model validates the dict once; no intermediate NodeResponse
+    return node_data
 
 @app.put("/api/v1/nodes/{node_id}")
 async def update_node(node_id: str, update: NodeUpdate, source: str = "api"):
@@ -464,6 +880,20 @@ async def update_node(node_id: str, update: NodeUpdate, source: str = "api"):
     return NodeResponse(**node)
 
 
+# node_id -> (evidence list, hashes in it, length when indexed). Kept beside the node
+# rather than in properties so properties stay plain JSON; an entry is only trusted
+# while the node still holds that same list at that same length.
+_evidence_index: Dict[str, Tuple[list, Set[str], int]] = {}
+
+def _evidence_hashes(node_id: str, evidence: list) -> Set[str]:
+    """Hashes of a node's evidence items, rebuilt only when the list was replaced or edited"""
+    cached = _evidence_index.get(node_id)
+    if cached is not None and cached[0] is evidence and cached[2] == len(evidence):
+        return cached[1]
+    hashes = {e.get("hash") for e in evidence if e.get("hash")}
+    _evidence_index[node_id] = (evidence, hashes, len(evidence))
+    return hashes
+
 @app.patch("/api/v1/nodes/{node_id}")
 async def patch_node(node_id: str, update: NodeUpdate, source: str = "api"):
     """
@@ -480,16 +910,19 @@ async def patch_node(node_id: str, update: NodeUpdate, source: str = "api"):
     for key, value in update.properties.items():
         if key == "evidence" and isinstance(value, list):
             # Append evidence, don't replace (with deduplication by hash)
-            existing_evidence = node["properties"].get("evidence", [])
-            existing_hashes = {e.get("hash") for e in existing_evidence if e.get("hash")}
+            existing_evidence = node["properties"].setdefault("evidence", [])
+            existing_hashes = _evidence_hashes(node_id, existing_evidence)
             new_evidence = [e for e in value if e.get("hash") not in existing_hashes]
-            node["properties"]["evidence"] = existing_evidence + new_evidence
+            existing_evidence.extend(new_evidence)
+            existing_hashes.update(e["hash"] for e in new_evidence if e.get("hash"))
+            _evidence_index[node_id] = (existing_evidence, existing_hashes, len(existing_evidence))
         else:
             node["properties"][key] = value
 
     node["updated_at"] = datetime.utcnow().isoformat()
 
-    # Persist to database
+    # Persist to database (after any queued insert of this node)
+    await flush_writes()
     await database.update_node(node_id, node)
 
     # Determine event type
@@ -505,7 +938,7 @@ async def patch_node(node_id: str, update: NodeUpdate, source: str = "api"):
         event_type=event_type,
         source=source,
         payload={
-            "node": serialize_for_json(node),
+            "node": node,
             "old_status": old_status,
             "new_status": new_status
         }
@@ -517,13 +950,14 @@ async def patch_node(node_id: str, update: NodeUpdate, source: str = "api"):
 @app.get("/api/v1/nodes")
 async def list_nodes(mission_id: Optional[str] = None, type: Optional[str] = None, limit: int = 1000):
     """List nodes with optional mission_id and type filters"""
-    results = []
-    for node in nodes_store.values():
-        if mission_id and node.get("mission_id") != mission_id:
-            continue
-        if type and node.get("type") != type:
-            continue
-        results.append(node)
+    if mission_id and type:
+        results = list(nodes_by_mission_type.get(mission_id, {}).get(type, {}).values())
+    elif mission_id:
+        results = list(nodes_by_mission.get(mission_id, {}).values())
+    elif type:
+        results = [node for node in nodes_store.values() if node.get("type") == type]
+    else:
+        results = list(nodes_store.values())
     return {"nodes": results[:limit], "total": len(results)}
 
 @app.get("/api/v1/nodes/{node_id}", response_model=NodeResponse)
@@ -531,7 +965,7 @@ async def get_node(node_id: str):
     """Get a node by ID"""
     if node_id not in nodes_store:
         raise HTTPException(status_code=404, detail="Node not found")
-    return NodeResponse(**nodes_store[node_id])
+    return nodes_store[node_id]
 
 @app.delete("/api/v1/nodes/{node_id}")
 async def delete_node(node_id: str, source: str = "api"):
@@ -539,7 +973,7 @@ async def delete_node(node_id: str, source: str = "api"):
     if node_id not in nodes_store:
         raise HTTPException(status_code=404, detail="Node not found")
 
-    node = nodes_store.pop(node_id)
+    node = drop_node(node_id)
 
     # Publish event
     event = GraphEvent(
@@ -555,11 +989,17 @@ async def delete_node(node_id: str, source: str = "api"):
 @app.post("/api/v1/nodes/query")
 async def query_nodes(query: GraphQuery):
     """Query nodes with filters"""
+    if query.node_types and len(set(query.node_types)) == 1:
+        # Single type: read the (mission, type) index directly
+        candidates = nodes_by_mission_type.get(query.mission_id, {}).get(query.node_types[0], {}).values()
+        node_types = None
+    else:
+        candidates = nodes_by_mission.get(query.mission_id, {}).values()
+        node_types = set(query.node_types) if query.node_types else None
+
     results = []
-    for node in nodes_store.values():
-        if node["mission_id"] != query.mission_id:
-            continue
-        if query.node_types and node["type"] not in query.node_types:
+    for node in candidates:
+        if node_types and node["type"] not in node_types:
             continue
         if query.risk_score_min:
             risk = node.get("properties", {}).get("risk_score", 0)
@@ -577,21 +1017,27 @@ async def query_nodes(query: GraphQuery):
         "offset": query.offset
     }
 
+_VALID_EDGE_TYPES: frozenset = frozenset(e.value for e in EdgeType)
+_VALID_EDGE_TYPES_SORTED: List[str] = sorted(_VALID_EDGE_TYPES)
+
 def validate_edge_type(relation: str) -> str:
     """Validate and normalize edge type against EdgeType enum"""
     if not relation:
         raise HTTPException(status_code=400, detail="Edge relation/type is required")
 
+    # Already canonical (the common case): no new string needed
+    if relation in _VALID_EDGE_TYPES:
+        return relation
+
     # Normalize: uppercase, strip whitespace
     normalized = relation.strip().upper()
 
     # Check if it's a valid EdgeType
-    valid_types = {e.value for e in EdgeType}
-    if normalized not in valid_types:
-        logger.warning("invalid_edge_type", relation=relation, valid_types=list(valid_types))
+    if normalized not in _VALID_EDGE_TYPES:
+        logger.warning("invalid_edge_type", relation=relation, valid_types=_VALID_EDGE_TYPES_SORTED)
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid edge type: '{relation}'. Valid types: {sorted(valid_types)}"
+            detail=f"Invalid edge type: '{relation}'. Valid types: {_VALID_EDGE_TYPES_SORTED}"
         )
     return normalized
 
@@ -630,13 +1076,11 @@ async def create_edge(edge: EdgeCreate, source: str = "api"):
         "created_at": datetime.utcnow().isoformat()
     }
 
-    # Check if edge already exists in memory (idempotent check)
-    existing = next((e for e in edges_store if e.get("id") == edge_id), None)
-    if not existing:
-        edges_store.append(edge_data)
+    # Keep the existing in-memory edge on repeats (idempotent check)
+    store_edge(edge_data)
 
-    # Persist to database (uses INSERT OR IGNORE)
-    await database.create_edge(edge_data)
+    # Persist to database (queued; the writer uses INSERT OR IGNORE)
+    await queue_write("edge", edge_data)
 
     # Publish event
     event = GraphEvent(
@@ -652,19 +1096,17 @@ async def create_edge(edge: EdgeCreate, source: str = "api"):
 @app.get("/api/v1/missions/{mission_id}/edges")
 async def get_mission_edges(mission_id: str):
     """Get all edges for a mission"""
-    mission_edges = [e for e in edges_store if e["mission_id"] == mission_id]
+    mission_edges = list(edges_by_mission.get(mission_id, {}).values())
     return {"edges": mission_edges, "total": len(mission_edges)}
 
 @app.get("/api/v1/missions/{mission_id}/stats", response_model=GraphStats)
 async def get_mission_stats(mission_id: str):
     """Get statistics for a mission's graph"""
-    mission_nodes = [n for n in nodes_store.values() if n["mission_id"] == mission_id]
-    mission_edges = [e for e in edges_store if e["mission_id"] == mission_id]
+    mission_nodes = nodes_by_mission.get(mission_id, {})
+    mission_edges = edges_by_mission.get(mission_id, {})
 
-    nodes_by_type = {}
-    for node in mission_nodes:
-        t = node["type"]
-        nodes_by_type[t] = nodes_by_type.get(t, 0) + 1
+    # Per-type counts are the sizes of the (mission, type) buckets: O(types), not O(nodes)
+    nodes_by_type = {t: len(bucket) for t, bucket in nodes_by_mission_type.get(mission_id, {}).items()}
 
     return GraphStats(
         mission_id=mission_id,
@@ -679,28 +1121,19 @@ async def export_graph(mission_id: str):
     return await get_mission_snapshot(mission_id)
 
 # Batch operations for performance
-@app.post("/api/v1/nodes/batch")
-async def create_nodes_batch(nodes: List[NodeCreate], source: str = "batch"):
-    """Create multiple nodes in one request"""
-    created = []
+async def _create_nodes(created: List[Dict], source: str) -> Dict:
+    """Store validated nodes ({id, type, mission_id, properties}) and publish one batch event"""
     now = datetime.utcnow()
 
-    for node in nodes:
-        node_data = {
-            "id": node.id,
-            "type": node.type,
-            "mission_id": node.mission_id,
-            "properties": node.properties,
-            "created_at": now,
-            "updated_at": now
-        }
-        nodes_store[node.id] = node_data
-        created.append(node_data)
+    for node_data in created:
+        node_data["created_at"] = now
+        node_data["updated_at"] = now
+        store_node(node_data)
 
     # Publish single batch event
-    if nodes:
+    if created:
         event = GraphEvent(
-            run_id=nodes[0].mission_id,
+            run_id=created[0]["mission_id"],
             event_type=EventType.NODE_ADDED,
             source=source,
             payload={"nodes": created, "count": len(created)}
@@ -709,6 +1142,46 @@ async def create_nodes_batch(nodes: List[NodeCreate], source: str = "batch"):
 
     return {"created": len(created), "nodes": created}
 
+@app.post("/api/v1/nodes/batch")
+async def create_nodes_batch(nodes: List[NodeCreate], source: str = "batch"):
+    """Create multiple nodes in one request"""
+    return await _create_nodes([
+        {"id": node.id, "type": node.type, "mission_id": node.mission_id, "properties": node.properties}
+        for node in nodes
+    ], source)
+
+_NODE_TYPES_BY_VALUE: Dict[str, NodeType] = NodeType._value2member_map_
+
+@app.post("/api/v1/nodes/batchRaw")
+async def create_nodes_batch_raw(nodes: List[Dict[str, Any]], source: str = "batch"):
+    """
+    Create multiple nodes from plain JSON objects.
+    Same as /api/v1/nodes/batch without a NodeCreate model per item: only id, type,
+    mission_id and properties are checked. Any invalid item rejects the whole batch.
+    """
+    created = []
+    errors = []
+
+    for i, node in enumerate(nodes):
+        node_id = node.get("id")
+        mission_id = node.get("mission_id")
+        raw_type = node.get("type")
+        node_type = _NODE_TYPES_BY_VALUE.get(raw_type) if isinstance(raw_type, str) else None
+        properties = node.get("properties", {})
+
+        if not isinstance(node_id, str) or not isinstance(mission_id, str):
+            errors.append({"index": i, "error": "id and mission_id must be strings"})
+        elif node_type is None:
+            errors.append({"index": i, "error": f"Invalid node type: {raw_type!r}"})
+        elif not isinstance(properties, dict):
+            errors.append({"index": i, "error": "properties must be an object"})
+        else:
+            created.append({"id": node_id, "type": node_type, "mission_id": mission_id, "properties": properties})
+
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return await _create_nodes(created, source)
+
 @app.post("/api/v1/edges/batch")
 async def create_edges_batch(edges: List[EdgeCreate], source: str = "batch"):
     """
@@ -750,15 +1223,13 @@ async def create_edges_batch(edges: List[EdgeCreate], source: str = "batch"):
             "created_at": now
         }
 
-        # Check if edge already exists in memory (idempotent check)
-        existing = next((e for e in edges_store if e.get("id") == edge_id), None)
-        if not existing:
-            edges_store.append(edge_data)
+        # Keep the existing in-memory edge on repeats (idempotent check)
+        store_edge(edge_data)
         created.append(edge_data)
 
     # Persist to database using batch function (atomic transaction)
     if created:
-        await database.create_edges_batch(created)
+        await _execute_with_retry(database.create_edges_batch, created)
 
     # Publish single batch event
     if created:
@@ -847,7 +1318,7 @@ async def batch_upsert_graph(request: BatchUpsertRequest, source: str = "batch")
     # In-memory is only updated after successful commit
     if prepared_nodes or prepared_edges:
         try:
-            await database.batch_upsert(prepared_nodes, prepared_edges)
+            await _execute_with_retry(database.batch_upsert, prepared_nodes, prepared_edges)
         except Exception as e:
             # DB failed - don't update in-memory, propagate error
             logger.error("batch_upsert_db_failed", mission_id=request.mission_id, error=str(e))
@@ -855,14 +1326,14 @@ async def batch_upsert_graph(request: BatchUpsertRequest, source: str = "batch")
 
     # DB commit successful - now update in-memory state
     for node_data in prepared_nodes:
-        nodes_store[node_data["id"]] = node_data
+        store_node(node_data)
 
     for edge_data in prepared_edges:
-        existing = next((e for e in edges_store if e.get("id") == edge_data["id"]), None)
-        if not existing:
-            edges_store.append(edge_data)
+        store_edge(edge_data)
 
-    # Publish batch events (only after successful commit)
+    # Publish batch events (only after successful commit), sharing one envelope timestamp
+    ts_epoch = time.time()
+    ts_iso = format_ts_iso(ts_epoch)
     if prepared_nodes:
         event = GraphEvent(
             run_id=request.mission_id,
@@ -870,7 +1341,7 @@ async def batch_upsert_graph(request: BatchUpsertRequest, source: str = "batch")
             source=source,
             payload={"nodes": prepared_nodes, "count": len(prepared_nodes)}
         )
-        await publish_event(event)
+        await publish_event(event, ts_epoch=ts_epoch, ts_iso=ts_iso)
 
     if prepared_edges:
         event = GraphEvent(
@@ -879,7 +1350,7 @@ async def batch_upsert_graph(request: BatchUpsertRequest, source: str = "batch")
             source=source,
             payload={"edges": prepared_edges, "count": len(prepared_edges)}
         )
-        await publish_event(event)
+        await publish_event(event, ts_epoch=ts_epoch, ts_iso=ts_iso)
 
     result = {
         "status": "success" if not errors else "partial",
@@ -899,6 +1370,32 @@ async def batch_upsert_graph(request: BatchUpsertRequest, source: str = "batch")
 # Layout persistence for workflow visualization
 layouts_store: Dict[str, Dict] = {}  # mission_id -> layout positions
 
+# Layouts are persisted write-behind: save_layout only records the latest layout per mission
+# and a background task writes them, so a burst of drag updates becomes one database write.
+LAYOUT_FLUSH_INTERVAL = 0.5  # seconds
+_pending_layouts: Dict[str, Dict] = {}  # mission_id -> latest layout not yet persisted
+_layout_flush_lock = asyncio.Lock()
+_layout_flusher_task: Optional[asyncio.Task] = None
+
+async def flush_layouts():
+    """Persist every pending layout (and wait for a flush already in progress)"""
+    async with _layout_flush_lock:
+        for mission_id, layout in list(_pending_layouts.items()):
+            try:
+                await _execute_with_retry(database.save_layout, mission_id, layout)
+            except Exception as e:
+                # Stays pending: retried on the next flush
+                logger.error("layout_save_failed", mission_id=mission_id, error=str(e))
+                continue
+            # Cleared only once written, and only if no newer layout arrived meanwhile
+            if _pending_layouts.get(mission_id) is layout:
+                del _pending_layouts[mission_id]
+
+async def _layout_flusher():
+    while True:
+        await asyncio.sleep(LAYOUT_FLUSH_INTERVAL)
+        await flush_layouts()
+
 class LayoutSave(BaseModel):
     positions: Dict[str, Dict[str, float]]  # node_id -> {x, y}
     zoom: Optional[float] = 1.0
@@ -913,8 +1410,8 @@ async def save_layout(mission_id: str, layout: LayoutSave):
         "pan": layout.pan or {"x": 0, "y": 0},
         "updated_at": datetime.utcnow().isoformat()
     }
-    # Persist to database
-    await database.save_layout(mission_id, layouts_store[mission_id])
+    # Persisted by the layout flusher
+    _pending_layouts[mission_id] = layouts_store[mission_id]
     return {"status": "saved", "mission_id": mission_id}
 
 @app.get("/api/v1/layouts/{mission_id}")
@@ -948,24 +1445,25 @@ async def query_workflow(query: WorkflowQuery):
 
     # Get workflow nodes
     nodes = [
-        serialize_for_json(n) for n in nodes_store.values()
-        if n["mission_id"] == query.mission_id and n["type"] in types_filter
+        n for n in nodes_by_mission.get(query.mission_id, {}).values()
+        if n["type"] in types_filter
     ]
 
     # Get workflow edges if requested
     edges = []
     if query.include_edges:
         edges = [
-            serialize_for_json(e) for e in edges_store
-            if e["mission_id"] == query.mission_id and e["relation"] in workflow_edges
+            e for e in edges_by_mission.get(query.mission_id, {}).values()
+            if e["relation"] in workflow_edges
         ]
 
-    return {
-        "nodes": nodes,
-        "edges": edges,
-        "total_nodes": len(nodes),
-        "total_edges": len(edges)
-    }
+    # Encoded straight from the stored dicts (like the WebSocket snapshot): no serialized
+    # copies, and no second walk by FastAPI's encoder
+    content = (
+        f'{{"nodes":{_encode_stored_list(nodes)},"edges":{_encode_stored_list(edges)},'
+        f'"total_nodes":{len(nodes)},"total_edges":{len(edges)}}}'
+    )
+    return Response(content=content, media_type="application/json")
 
 # ==================== DELETION ENDPOINTS ====================
 
@@ -975,28 +1473,33 @@ async def delete_mission(mission_id: str, source: str = "api"):
     logger.info("deleting_mission", mission_id=mission_id, source=source)
 
     # Remove from memory stores
-    nodes_to_remove = [nid for nid, n in nodes_store.items() if n["mission_id"] == mission_id]
+    nodes_to_remove = nodes_by_mission.pop(mission_id, {})
     for nid in nodes_to_remove:
         del nodes_store[nid]
+        _evidence_index.pop(nid, None)
+    nodes_by_mission_type.pop(mission_id, None)
 
-    edges_before = len(edges_store)
-    edges_store[:] = [e for e in edges_store if e["mission_id"] != mission_id]
-    edges_removed = edges_before - len(edges_store)
+    mission_edges = edges_by_mission.pop(mission_id, {})
+    for edge_id in mission_edges:
+        del edges_store[edge_id]
+    edges_removed = len(mission_edges)
 
-    # Remove from layouts store
+    # Remove from layouts store (and drop any write not yet flushed)
     if mission_id in layouts_store:
         del layouts_store[mission_id]
+    _pending_layouts.pop(mission_id, None)
 
-    # Remove from WebSocket connections
-    if mission_id in ws_connections:
-        for ws in list(ws_connections[mission_id]):
-            try:
-                await ws.close(code=1000, reason="Mission deleted")
-            except Exception:
-                pass
-        del ws_connections[mission_id]
+    # Remove from WebSocket connections, closing them in parallel
+    channels = ws_connections.pop(mission_id, [])
+    await asyncio.gather(
+        *(channel.close(code=1000, reason="Mission deleted") for channel in channels),
+        return_exceptions=True
+    )
 
-    # Delete from database
+    # Delete from database (queued writes first, so none land after the delete)
+    await flush_writes()
+    await discard_unpersisted_writes(mission_id)
+    await flush_layouts()
     result = await database.delete_mission(mission_id)
 
     # Publish deletion event
@@ -1047,13 +1550,21 @@ async def clear_all_data(confirm: str = None, source: str = "api"):
     edges_count = len(edges_store)
 
     nodes_store.clear()
+    _evidence_index.clear()
+    nodes_by_mission.clear()
+    nodes_by_mission_type.clear()
     edges_store.clear()
+    edges_by_mission.clear()
     layouts_store.clear()
+    _pending_layouts.clear()
 
     # Close all WebSocket connections
     await close_all_websockets()
 
-    # Clear database
+    # Clear database (queued writes first, so none land after the clear)
+    await flush_writes()
+    await discard_unpersisted_writes()
+    await flush_layouts()
     result = await database.clear_all_data()
 
     logger.warning("all_data_cleared", **result)
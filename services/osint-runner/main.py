@@ -5,22 +5,22 @@ Matches CLI workflow exactly
 """
 import os
 import sys
+import re
 import json
 import yaml
 import asyncio
 import subprocess
 import shutil
 import tempfile
-import time
-import requests
 from pathlib import Path
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from urllib.parse import urlparse
 import httpx
+import orjson
 import structlog
 
 # Disable telemetry
@@ -28,7 +28,7 @@ os.environ["OTEL_SDK_DISABLED"] = "true"
 os.environ["CREWAI_TELEMETRY_OPTOUT"] = "true"
 
 logger = structlog.get_logger()
-app = FastAPI(title="OSINT Runner", version="2.1.0")
+app = FastAPI(title="OSINT Runner", version="2.1.0", default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 # Service URLs
@@ -36,6 +36,39 @@ GRAPH_SERVICE = os.getenv("GRAPH_SERVICE_URL", "http://graph-service:8001")
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://host.docker.internal:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "qwen2.5:14b")
 
+# Request bodies are pre-serialized with orjson
+JSON_HEADERS = {"content-type": "application/json"}
+
+# Max nodes + edges per graph-service batch upsert request
+PUBLISH_BATCH_SIZE = 1000
+# Max graph-service publish requests in flight per run
+PUBLISH_CONCURRENCY = int(os.getenv("OSINT_PUBLISH_CONCURRENCY", "32"))
+
+# Wayback CDX queries in flight, and the minimum time between two query starts across
+# all runs in this process (web.archive.org throttles or blocks faster clients)
+WAYBACK_CONCURRENCY = int(os.getenv("WAYBACK_CONCURRENCY", "6"))
+WAYBACK_MIN_INTERVAL = float(os.getenv("WAYBACK_MIN_INTERVAL", "1.0"))
+
+
+class RateLimiter:
+    """Spaces request starts at least `interval` seconds apart, shared by every task using it"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = loop.time() + self.interval
+
+
+wayback_rate_limiter = RateLimiter(WAYBACK_MIN_INTERVAL)
+
 
 class ExecuteRequest(BaseModel):
     mission_id: str
@@ -131,67 +164,73 @@ class WaybackTool:
     INTERESTING_KEYWORDS = ["/api/", "/admin/", "/graphql", "/wp-json/", "/auth/", "/v1/", "/v2/", "/login", "/user"]
     IGNORED_EXTENSIONS = [".jpg", ".jpeg", ".png", ".gif", ".css", ".js", ".svg", ".woff", ".woff2", ".ttf", ".ico", ".mp4", ".mp3"]
 
-    def run(self, domains: List[str], limit: int = 3000) -> List[Dict]:
-        logger.info("wayback_starting", domains=domains, limit=limit)
-        results = []
-
-        for domain in domains:
-            if not domain:
-                continue
+    # Precompiled forms of the lists above, checked once per URL
+    IGNORED_SUFFIXES = tuple(IGNORED_EXTENSIONS)
+    INTERESTING_RE = re.compile("|".join(map(re.escape, INTERESTING_EXTENSIONS + INTERESTING_KEYWORDS)))
 
-            # Query Wayback CDX API
-            api_url = f"http://web.archive.org/cdx/search/cdx?url=*.{domain}/*&output=json&fl=original&collapse=urlkey&limit={limit}"
+    async def run(self, domains: List[str], limit: int = 3000) -> List[Dict]:
+        logger.info("wayback_starting", domains=domains, limit=limit)
+        semaphore = asyncio.Semaphore(WAYBACK_CONCURRENCY)
 
-            try:
-                time.sleep(1)  # Rate limiting
-                resp = requests.get(api_url, timeout=30)
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            per_domain = await asyncio.gather(*(
+                self._query_domain(client, semaphore, domain, limit)
+                for domain in domains if domain
+            ))
 
-                if resp.status_code == 200:
-                    data = resp.json()
-                    # Skip header row
-                    if data and data[0][0] == "original":
-                        data = data[1:]
+        results = [endpoint for endpoints in per_domain for endpoint in endpoints]
+        logger.info("wayback_completed", total_endpoints=len(results))
+        return results
 
-                    found_urls = set()
+    async def _query_domain(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                            domain: str, limit: int) -> List[Dict]:
+        """Query the Wayback CDX API for one domain and keep its interesting URLs"""
+        # Plain text output: one original URL per line, no header row, parsed as it streams in
+        api_url = f"http://web.archive.org/cdx/search/cdx?url=*.{domain}/*&fl=original&collapse=urlkey&limit={limit}"
+        results = []
+        found_urls = set()
 
-                    for row in data:
-                        raw_url = row[0]
+        try:
+            async with semaphore:
+                await wayback_rate_limiter.wait()
+                async with client.stream("GET", api_url) as resp:
+                    if resp.status_code != 200:
+                        logger.warning("wayback_http_error", domain=domain, status=resp.status_code)
+                        return results
+
+                    async for line in resp.aiter_lines():
+                        raw_url = line.strip()
+                        if not raw_url:
+                            continue
                         lower_url = raw_url.lower()
 
                         # Skip ignored extensions
-                        if any(lower_url.endswith(ext) for ext in self.IGNORED_EXTENSIONS):
+                        if lower_url.endswith(self.IGNORED_SUFFIXES):
                             continue
 
-                        # Check if interesting
-                        is_interesting = (
-                            any(ext in lower_url for ext in self.INTERESTING_EXTENSIONS) or
-                            any(kw in lower_url for kw in self.INTERESTING_KEYWORDS)
-                        )
-
-                        if is_interesting:
+                        # Check if interesting (any extension or keyword substring)
+                        if self.INTERESTING_RE.search(lower_url):
                             base_path = raw_url.split("?")[0] if "?" in raw_url else raw_url
                             found_urls.add((raw_url, base_path))
 
-                    # Deduplicate by base path
-                    seen_paths = set()
-                    for full_url, base_path in found_urls:
-                        if base_path in seen_paths:
-                            continue
-                        seen_paths.add(base_path)
-                        results.append({
-                            "path": full_url,
-                            "method": "GET",
-                            "source": "WAYBACK",
-                            "origin": domain
-                        })
+            # Deduplicate by base path
+            seen_paths = set()
+            for full_url, base_path in found_urls:
+                if base_path in seen_paths:
+                    continue
+                seen_paths.add(base_path)
+                results.append({
+                    "path": full_url,
+                    "method": "GET",
+                    "source": "WAYBACK",
+                    "origin": domain
+                })
 
-                    logger.info("wayback_domain_completed", domain=domain, endpoints=len(seen_paths))
+            logger.info("wayback_domain_completed", domain=domain, endpoints=len(seen_paths))
 
-            except Exception as e:
-                logger.warning("wayback_error", domain=domain, error=str(e))
-                continue
+        except Exception as e:
+            logger.warning("wayback_error", domain=domain, error=str(e))
 
-        logger.info("wayback_completed", total_endpoints=len(results))
         return results
 
 
@@ -201,6 +240,13 @@ class WaybackTool:
 class OsintRunner:
     """OSINT Runner with real tool integration - matches CLI workflow"""
 
+    # Network location of an absolute URL ("scheme://netloc..." or "//netloc..."), as urlparse finds it
+    URL_NETLOC_RE = re.compile(r"(?:[A-Za-z][A-Za-z0-9+.-]*:)?//([^/?#]*)")
+    # urlsplit first drops leading C0 controls/spaces and every tab/CR/LF; so must we, or
+    # "\x00http://other.host/" would look like a relative (in-scope) URL
+    URL_LEADING_JUNK = "".join(map(chr, range(0x21)))
+    URL_REMOVED_CHARS = str.maketrans("", "", "\t\r\n")
+
     def __init__(self, target_domain: str, mission_id: str, mode: str = "aggressive"):
         self.target_domain = target_domain
         self.mission_id = mission_id
@@ -213,46 +259,99 @@ class OsintRunner:
             "dns_records": [],
             "errors": []
         }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._publish_sem = asyncio.Semaphore(PUBLISH_CONCURRENCY)
+
+    def _in_scope(self, host: str) -> bool:
+        """Whether a hostname belongs to the target domain"""
+        return self.target_domain in host
+
+    def _url_in_scope(self, url: str) -> bool:
+        """Whether a URL's host belongs to the target domain (relative URLs are in scope)"""
+        url = url.lstrip(self.URL_LEADING_JUNK).translate(self.URL_REMOVED_CHARS)
+        match = self.URL_NETLOC_RE.match(url)
+        return match is None or not match.group(1) or self._in_scope(match.group(1))
 
     async def publish_node(self, node_type: str, node_id: str, properties: Dict) -> bool:
         """Publish a node to graph-service"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{GRAPH_SERVICE}/api/v1/nodes",
-                    json={
-                        "id": node_id,
-                        "type": node_type,
-                        "mission_id": self.mission_id,
-                        "properties": properties
-                    }
-                )
-                return response.status_code in [200, 201]
-            except Exception as e:
-                logger.error("publish_node_failed", node_id=node_id, error=str(e))
-                return False
+        try:
+            response = await self._client.post(
+                "/api/v1/nodes",
+                json={
+                    "id": node_id,
+                    "type": node_type,
+                    "mission_id": self.mission_id,
+                    "properties": properties
+                }
+            )
+            return response.status_code in [200, 201]
+        except Exception as e:
+            logger.error("publish_node_failed", node_id=node_id, error=str(e))
+            return False
 
-    async def publish_edge(self, from_node: str, to_node: str, relation: str) -> bool:
-        """Publish an edge to graph-service"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+    def build_node(self, node_type: str, node_id: str, properties: Dict) -> Dict:
+        """Node payload for publish_batch"""
+        return {"id": node_id, "type": node_type, "mission_id": self.mission_id, "properties": properties}
+
+    def build_edge(self, from_node: str, to_node: str, relation: str) -> Dict:
+        """Edge payload for publish_batch"""
+        return {
+            "from_node": from_node,
+            "to_node": to_node,
+            "relation": relation,
+            "mission_id": self.mission_id,
+            "properties": {}
+        }
+
+    async def publish_batch(self, nodes: List[Dict], edges: List[Dict]) -> bool:
+        """Publish nodes and edges to graph-service via batch upsert, PUBLISH_BATCH_SIZE items per request"""
+        # Nodes are packed before edges, so most edges share a request with their endpoints
+        items = [("nodes", node) for node in nodes] + [("edges", edge) for edge in edges]
+        payloads = []
+        for start in range(0, len(items), PUBLISH_BATCH_SIZE):
+            payload = {"mission_id": self.mission_id, "nodes": [], "edges": []}
+            for kind, item in items[start:start + PUBLISH_BATCH_SIZE]:
+                payload[kind].append(item)
+            payloads.append(payload)
+
+        results = await asyncio.gather(*(self._post_batch(payload) for payload in payloads))
+        return all(results)
+
+    async def publish_phase(self, phase: str, nodes: List[Dict], edges: List[Dict]):
+        """publish_batch for one workflow phase, recording a failed publish in the run's errors"""
+        if not await self.publish_batch(nodes, edges):
+            logger.error("phase_publish_failed", phase=phase, nodes=len(nodes), edges=len(edges))
+            self.results["errors"].append(f"{phase}: graph publish failed")
+
+    async def _post_batch(self, payload: Dict) -> bool:
+        """POST one batch upsert request (at most PUBLISH_CONCURRENCY in flight)"""
+        async with self._publish_sem:
             try:
-                response = await client.post(
-                    f"{GRAPH_SERVICE}/api/v1/edges",
-                    json={
-                        "from_node": from_node,
-                        "to_node": to_node,
-                        "relation": relation,
-                        "mission_id": self.mission_id,
-                        "properties": {}
-                    }
+                response = await self._client.post(
+                    "/api/v1/graph/batchUpsert", content=orjson.dumps(payload), headers=JSON_HEADERS
                 )
-                return response.status_code in [200, 201]
+                if response.status_code not in [200, 201]:
+                    logger.error("publish_batch_failed", status=response.status_code,
+                                 nodes=len(payload["nodes"]), edges=len(payload["edges"]))
+                    return False
+                return True
             except Exception as e:
-                logger.error("publish_edge_failed", error=str(e))
+                logger.error("publish_batch_failed", nodes=len(payload["nodes"]),
+                             edges=len(payload["edges"]), error=str(e))
                 return False
 
     async def run(self) -> Dict:
         """Execute OSINT phase - matches CLI workflow"""
+        # One pooled keep-alive client for every graph-service call in this run
+        limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        async with httpx.AsyncClient(base_url=GRAPH_SERVICE, timeout=30.0, limits=limits) as client:
+            self._client = client
+            try:
+                return await self._run()
+            finally:
+                self._client = None
+
+    async def _run(self) -> Dict:
         start_time = datetime.utcnow()
         loop = asyncio.get_event_loop()
 
@@ -284,13 +383,16 @@ class OsintRunner:
         if subfinder_result.get("error"):
             self.results["errors"].append(f"subfinder: {subfinder_result['error']}")
 
-        # Publish discovered subdomains
+        # Publish discovered subdomains in one batch
+        discovered_at = datetime.utcnow().isoformat()
+        nodes = []
+        edges = []
         for subdomain in subdomains:
-            if self.target_domain not in subdomain:
+            if not self._in_scope(subdomain):
                 logger.warning("rejected_out_of_scope", subdomain=subdomain)
                 continue
 
-            await self.publish_node(
+            nodes.append(self.build_node(
                 "SUBDOMAIN",
                 subdomain,
                 {
@@ -299,11 +401,12 @@ class OsintRunner:
                     "tag": "SUBFINDER_DIRECT",
                     "category": "RECON",
                     "source": "subfinder",
-                    "discovered_at": datetime.utcnow().isoformat()
+                    "discovered_at": discovered_at
                 }
-            )
-            await self.publish_edge(self.target_domain, subdomain, "HAS_SUBDOMAIN")
+            ))
+            edges.append(self.build_edge(self.target_domain, subdomain, "HAS_SUBDOMAIN"))
             self.results["subdomains"].append(subdomain)
+        await self.publish_phase("subfinder", nodes, edges)
 
         logger.info("phase_subfinder_completed", count=len(self.results["subdomains"]))
 
@@ -315,25 +418,18 @@ class OsintRunner:
         # Query Wayback for all discovered subdomains + apex
         wayback_domains = list(set(self.results["subdomains"] + [self.target_domain]))
 
-        wayback_results = await loop.run_in_executor(
-            None,
-            lambda: self.wayback_tool.run(wayback_domains)
-        )
+        wayback_results = await self.wayback_tool.run(wayback_domains)
 
-        # Publish discovered endpoints
+        # Publish discovered endpoints in one batch
+        discovered_at = datetime.utcnow().isoformat()
+        nodes = []
         for endpoint in wayback_results:
             path = endpoint.get("path", "")
-
-            # Scope check
-            try:
-                parsed = urlparse(path)
-                if parsed.netloc and self.target_domain not in parsed.netloc:
-                    continue
-            except:
-                pass
+            if not self._url_in_scope(path):
+                continue
 
             endpoint_id = f"endpoint:{path}"
-            await self.publish_node(
+            nodes.append(self.build_node(
                 "ENDPOINT",
                 endpoint_id,
                 {
@@ -342,10 +438,11 @@ class OsintRunner:
                     "source": "WAYBACK",
                     "origin": endpoint.get("origin", ""),
                     "confidence": 0.6,
-                    "discovered_at": datetime.utcnow().isoformat()
+                    "discovered_at": discovered_at
                 }
-            )
+            ))
             self.results["endpoints"].append(endpoint)
+        await self.publish_phase("wayback", nodes, [])
 
         logger.info("phase_wayback_completed", endpoints=len(wayback_results))
 
@@ -355,38 +452,30 @@ class OsintRunner:
         if len(self.results["subdomains"]) == 0:
             logger.warning("safety_net_triggered", reason="zero_subdomains")
 
-            # Inject apex domain
-            await self.publish_node(
-                "SUBDOMAIN",
-                self.target_domain,
-                {
-                    "name": self.target_domain,
-                    "priority": 10,
-                    "tag": "APEX_FALLBACK",
-                    "category": "RECON",
-                    "source": "safety_net",
-                    "discovered_at": datetime.utcnow().isoformat()
-                }
-            )
-            await self.publish_edge(self.target_domain, self.target_domain, "HAS_SUBDOMAIN")
-            self.results["subdomains"].append(self.target_domain)
-
-            # Inject www subdomain
+            # Inject apex + www subdomains in one batch
+            discovered_at = datetime.utcnow().isoformat()
             www_domain = f"www.{self.target_domain}"
-            await self.publish_node(
-                "SUBDOMAIN",
-                www_domain,
-                {
-                    "name": www_domain,
-                    "priority": 10,
-                    "tag": "APEX_FALLBACK",
-                    "category": "RECON",
-                    "source": "safety_net",
-                    "discovered_at": datetime.utcnow().isoformat()
-                }
+            fallback = [self.target_domain, www_domain]
+            await self.publish_phase(
+                "safety_net",
+                [
+                    self.build_node(
+                        "SUBDOMAIN",
+                        subdomain,
+                        {
+                            "name": subdomain,
+                            "priority": 10,
+                            "tag": "APEX_FALLBACK",
+                            "category": "RECON",
+                            "source": "safety_net",
+                            "discovered_at": discovered_at
+                        }
+                    )
+                    for subdomain in fallback
+                ],
+                [self.build_edge(self.target_domain, subdomain, "HAS_SUBDOMAIN") for subdomain in fallback]
             )
-            await self.publish_edge(self.target_domain, www_domain, "HAS_SUBDOMAIN")
-            self.results["subdomains"].append(www_domain)
+            self.results["subdomains"].extend(fallback)
 
             logger.info("safety_net_injected", subdomains=[self.target_domain, www_domain])
 